@@ -1,23 +1,191 @@
 import os
+import json
 import pandas as pd
-import folderstats
 import settings
-import pathlib
-import hashlib
-import base64
+import scanner
+import storage
+import diff
+import filters
+import metrics
+import summary
+import figures
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def manifest_path(application):
+	# Returns path of the manifest of an application.
+	return os.path.join(settings.output_dir, application, 'manifest_' + application + '.json')
+
+
+def load_manifest(application):
+	# Returns dict of release fingerprints from the last run: {'release': fingerprint}
+	# Param 'application': string, name of the application
+	try:
+		with open(manifest_path(application)) as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def save_manifest(application, fingerprints):
+	# Writes release fingerprints of an application to its manifest.
+	# Param 'application': string, name of the application
+	# Param 'fingerprints': dict, {'release': fingerprint}
+	with open(manifest_path(application), 'w') as f:
+		json.dump(fingerprints, f, indent = 1)
+
+
+def list_releases(application):
+	# Returns sorted list of the releases of an application: release folders and
+	# archives in its input folder or tags of a bare git repository (see 'settings.git_tags').
+	# Param 'application': string, name of the application
+	path = os.path.join(settings.input_dir, application)
+	if scanner.is_git_repository(path):
+		return sorted(scanner.git_repository(path).tags(settings.git_tags.get(application, '*')))
+	return sorted(scanner.release_name(r) for r in os.listdir(path))
+
+
+def release_revision(application, release):
+	# Returns git tag of a release (None if the release is not read from a git repository).
+	if scanner.is_git_repository(os.path.join(settings.input_dir, application)):
+		return release
+	return None
+
+
+def release_path(application, release):
+	# Returns path of a release folder, release archive (see 'scanner.archive_extensions')
+	# or the git repository of an application.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	if release_revision(application, release) is not None:
+		return os.path.join(settings.input_dir, application)
+	path = os.path.join(settings.input_dir, application, release)
+	for extension in scanner.archive_extensions:
+		if os.path.isfile(path + extension):
+			return path + extension
+	return path
+
+
+def release_fingerprint(application, release):
+	# Returns fingerprint of a release folder used to detect changed releases.
+	# Only the release root folder is inspected, which is enough to notice
+	# releases being replaced or added to the input folder. Archives are
+	# identified by their mtime and size, git tags by their commit.
+	# Settings changing the exported tree (hash, format and filters) are included.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	path = release_path(application, release)
+	revision = release_revision(application, release)
+	if revision is not None:
+		# Tags are identified by their commit.
+		mtime = None
+		num_entries = scanner.git_repository(path).git('rev-parse', revision + '^{commit}')
+	elif scanner.is_archive(path):
+		mtime = os.stat(path).st_mtime
+		num_entries = os.stat(path).st_size
+	else:
+		mtime = os.stat(path).st_mtime
+		num_entries = len(os.listdir(path))
+	return {
+		'mtime': mtime,
+		'num_entries': num_entries,
+		'scanner_version': scanner.version,
+		'hash_mode': settings.hash_mode,
+		'output_format': settings.output_format,
+		'filters': filters.application_digest(application),
+	}
+
+
+def is_up_to_date(application, release, manifest, fingerprint):
+	# Returns True if the exported tree of a release can be reused.
+	# Param 'manifest': dict, release fingerprints from the last run
+	# Param 'fingerprint': dict, current fingerprint of the release
+	return (
+		settings.incremental
+		and manifest.get(release) == fingerprint
+		and storage.tree_exists(application, release)
+	)
+
+
+def analyze_release(application, release, reuse = False):
+	# Scans a release, exports its tree and returns its statistics.
+	# Returns tuple (release_stats, level_stats), see 'metrics.release_statistics'.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	# Param 'reuse': bool, read the tree exported by an earlier run instead of scanning
+
+	summary = metrics.ReleaseSummary()
+	path = release_path(application, release)
+	revision = release_revision(application, release)
+	exclude, file_extensions = filters.application_filters(application)
+
+	if reuse:
+		# Reads unchanged release tree from the last run chunk by chunk.
+		for chunk in storage.iter_tree(application, release, chunk_size = settings.stream_chunk_size):
+			summary.add(chunk)
+		if settings.compact_trees and not settings.streaming and not storage.compact_tree_exists(application, release):
+			storage.write_compact_tree(application, release, storage.read_tree(application, release))
+
+	elif settings.streaming:
+		# Streams the tree: rows are written and added to the metrics in chunks,
+		# only the current chunk and the open ancestor folders are kept in memory.
+		# The writer removes the outdated compact tree, the dashboard builds it
+		# from the exported tree instead.
+		writer = storage.TreeWriter(application, release)
+		for chunk in scanner.stream_release(
+			path,
+			exclude = exclude,
+			file_extensions = file_extensions,
+			hash_name = settings.hash_mode,
+			chunk_size = settings.stream_chunk_size,
+			revision = revision
+		):
+			writer.write(chunk)
+			summary.add(chunk)
+		writer.close()
+
+	else:
+		# Get folder structure from current release as dataframe using the native 'scanner' module.
+		# Levels, direct file counts, path ids and parent ids are collected in a single
+		# walk and folders without source files in their subtree are already removed.
+		fs = scanner.scan_release(
+			path,
+			exclude = exclude,
+			file_extensions = file_extensions,
+			hash_name = settings.hash_mode,
+			hash_threads = settings.hash_threads,
+			revision = revision
+		)
+
+		# Export detailed release statistics (csv or parquet).
+		storage.write_tree(application, release, fs)
+		summary.add(fs)
+
+		# Export compact tree used by the dashboard.
+		if settings.compact_trees:
+			storage.write_compact_tree(application, release, fs)
 
+	return metrics.release_statistics(release, summary)
 
-# Creates a dict containing applications and releases: {'application': ['release']}
-applications = {
-	a: sorted(os.listdir(os.path.join(settings.input_dir, a))) 
-	for a in sorted(os.listdir(settings.input_dir)) if not a.startswith('.')
-}
 
+def exported_pairs(application):
+	# Returns set of tuples (previous release, release) of consecutive releases
+	# in the statistics exported by the last run (empty if not exported).
+	# Param 'application': string, name of the application
+	try:
+		releases = pd.read_csv(
+			os.path.join(settings.output_dir, application, 'stats_' + application + '.csv'),
+			usecols = ['release'], dtype = {'release': str})['release'].tolist()
+	except FileNotFoundError:
+		return set()
+	return set(zip(releases, releases[1:]))
 
-# Iterates over all applications to get statistics for each release.
-for application in applications:
-	
-	print(f"Started analyzing {application}")
+
+def export_application(application, results, analyzed = None):
+	# Assembles release and level statistics of an application and exports them to csv.
+	# Param 'application': string, name of the application
+	# Param 'results': list, (release_stats, level_stats) tuples of all releases in release order
+	# Param 'analyzed': set, releases scanned in this run (None if all releases were scanned)
 
 	release_stats = {
 		'release': [],
@@ -46,158 +214,11 @@ for application in applications:
 		'num_folders': [],
 	}
 
-
-	# Creates output folders if not existing.
-	os.makedirs(os.path.join(settings.output_dir, application), exist_ok = True)
-
-
-	# Iterate over all releases to get stats/metrics.
-	for release in applications[application]:
-
-		print(f"Analyzing {release}")
-		release_stats['release'].append(release)
-
-		# Get folder structure from current release as dataframe using 'folderstats' module.
-		fs = folderstats.folderstats(
-			os.path.join(settings.input_dir, application, release), 
-			ignore_hidden = True, 
-			hash_name = 'md5',
-			exclude = settings.exclude,
-			filter_extension = settings.file_extensions
-		)
-
-
-		# Count number of files in folder (direct children).
-		# 'Number of Files' from folderstats module can't be used since 
-		# it counts all files in a folder AND its subfolders.
-		num_files_direct = pd.DataFrame(fs[fs['folder'] == False]
-			.value_counts('parent')
-			.reset_index()
-		)
-		num_files_direct.columns = ['id', 'num_files_direct']
-		fs = pd.merge(fs, num_files_direct, on = 'id', how = 'left')
-
-		# Convert tree depth to level.
-		fs['depth'] = fs['depth'] + 1
-
-		# Cut path to start at root release folder.
-		def cut_path(p):
-			path = pathlib.Path(p)
-			return path.relative_to(*path.parts[:3])
-
-		fs['path'] = fs['path'].apply(cut_path)
-
-		# Creates hash from path.
-		# This ensures consistent id's even if nodes are added to the folder tree.
-		def hash_path(p):
-			hash_value = hashlib.md5(str(p).encode('utf-8')).hexdigest()
-			return hash_value
-
-		fs['hash_id'] = fs['path'].apply(hash_path)
-		
-		fs = pd.merge(fs, fs[['hash_id', 'id']], left_on = 'parent', right_on = 'id', how = 'left')
-
-		# Delete unused columns.
-		fs.drop(columns=['id_y','id_x', 'parent', 'uid', 'ctime', 'atime'], inplace=True)
-
-		# Rename columns
-		fs.rename(columns = {
-			'depth': 'level', 
-			'hash_id_y': 'parent',
-			'hash_id_x': 'id',
-			'size': 'size_bytes'
-		}, 
-		inplace = True)
-
-		# Removes all folders which do not contain at least one source file in its subtree.
-		fs = fs.drop(fs[(fs['folder'] == True) & (fs['num_files'] == 0)].index)
-
-		# Export detailed release statistics to csv.
-		fs.to_csv(
-			os.path.join(settings.output_dir, application, 'tree_' + release + '.csv'), 
-			index = False
-		)
-
-
-		# Calculate release metrics.
-
-		# Adds modification time to release statistics.
-		release_stats['mtime'].append(fs.iloc[0]['mtime'])
-		mtime = fs.iloc[0]['mtime']
-
-		# Gets total number of source folders.
-		num_source_folders = fs.loc[ fs['id'].isin(fs[fs['folder'] == False]['parent'])]
-		release_stats['num_source_folders'].append(len(num_source_folders))
-
-		# Calculates source folder size (number of files)
-		release_stats['max_source_folder_size_num_files'].append(fs['num_files_direct'].max())
-
-		# Gets total number of folders and files.
-		num_files = fs.loc[fs['folder'] == False].shape[0] 		# Total number of files.
-		num_folders = fs.loc[fs['folder'] == True].shape[0] 	# Total number of folders.
-		release_stats['num_files'].append(num_files)
-		release_stats['num_folders'].append(num_folders)
-
-		# Gets release size in bytes.
-		release_size_bytes = fs.loc[fs['folder'] == False, ['size_bytes']].sum()['size_bytes']
-		release_stats['release_size_bytes'].append(release_size_bytes)
-
-		# Gets max file size in bytes.
-		release_stats['max_file_size_bytes'].append(
-			fs.loc[fs['folder'] == False, ['size_bytes']].max()['size_bytes'])
-
-		# Calculates average file size in bytes.
-		release_stats['avg_file_size_bytes'].append(
-			round(fs.loc[fs['folder'] == False, ['size_bytes']].mean()['size_bytes'], 2))
-
-		# Calculates average folder size (number of files in folder).
-		release_stats['avg_source_folder_size_num_files'].append(
-			round(num_files / num_source_folders.shape[0], 2))
-
-		# Calculates average folder size (bytes).
-		release_stats['avg_source_folder_size_bytes'].append(
-			round(release_size_bytes / num_source_folders.shape[0], 0))
-		
-		# Gets maximum tree level.
-		max_tree_level = fs.loc[fs['folder'] == True]['level'].max()
-		release_stats['max_tree_level'].append(max_tree_level)
-
-
-		# Get level statistics. 
-
-		# Gets number of files per level.
-		files = fs.loc[fs['folder'] == False].value_counts('level').to_frame().reset_index()
-		files.columns = ['level', 'num_files']
-		files['mtime']= mtime
-		files['release'] = release
-
-		# Gets number of folders per level.
-		folders = fs.loc[fs['folder'] == True].value_counts('level').to_frame().reset_index()
-		folders.columns = ['level', 'num_folders']
-		folders['mtime']= mtime
-		folders['release'] = release
-
-		# Merges folder and file stats to one dataframe.
-		files_folders = pd.merge(folders, files, on=['level', 'release', 'mtime'], how = 'outer')
-		files_folders.sort_values(by = 'level', ascending = True, inplace = True)
-
-		level_stats['release'] += files_folders['release'].to_list()
-		level_stats['mtime'] += files_folders['mtime'].to_list()
-		level_stats['level'] += files_folders['level'].to_list()
-		level_stats['num_files'] += files_folders['num_files'].to_list()
-		level_stats['num_folders'] += files_folders['num_folders'].to_list()
-
-		# Gets max number of files and folders per level.
-		release_stats['max_num_files_level'].append(files_folders['num_files'].max())
-		max_num_folders_level = files_folders['num_folders'].max()
-		release_stats['max_num_folders_level'].append(max_num_folders_level)
-
-		# Gets average number of files and folders per level.
-		avg_num_files_level = round(files_folders['num_files'].mean(), 2)
-		avg_num_folders_level = round(files_folders['num_folders'].mean(), 2)
-		release_stats['avg_num_files_level'].append(avg_num_files_level)
-		release_stats['avg_num_folders_level'].append(avg_num_folders_level)
-
+	for release_result, level_result in results:
+		for key in release_stats:
+			release_stats[key].append(release_result[key])
+		for key in level_stats:
+			level_stats[key] += level_result[key]
 
 	# Convert dicts to dataframes.
 	df_release_stats = pd.DataFrame.from_dict(release_stats)
@@ -225,16 +246,127 @@ for application in applications:
 	df_release_stats['growth_avg_num_files_level_pct'] = pct_growth(df_release_stats['avg_num_files_level'])
 	df_release_stats['growth_tree_width_pct'] = pct_growth(df_release_stats['avg_num_files_level'])
 
-	# Exports results to csv.
-	df_release_stats.to_csv(
-		os.path.join(settings.output_dir, application, 'stats_' + application + '.csv'), 
-		index = False)
+	# Consecutive releases of the last run, read before its statistics are overwritten.
+	previous_pairs = exported_pairs(application) if analyzed is not None else set()
+
+	# Exports results to csv. The release statistics are written last, their
+	# mtime is the data version of the dashboard caches (see 'dataloader.stats_version').
 	df_level_stats.to_csv(
-		os.path.join(settings.output_dir, application, 'files-per-level_' + application + '.csv'), 
+		os.path.join(settings.output_dir, application, 'files-per-level_' + application + '.csv'),
+		index = False)
+	df_release_stats.to_csv(
+		os.path.join(settings.output_dir, application, 'stats_' + application + '.csv'),
 		index = False)
 
+	# Exports folders and files added, removed or changed between consecutive releases.
+	# Pairs of reused releases which were already consecutive in the last run keep their rows.
+	if settings.change_index:
+		previous_changes = diff.read_changes(application) if previous_pairs else None
+		reusable = set()
+		if previous_changes is not None:
+			reusable = {
+				(r1, r2) for r1, r2 in previous_pairs
+				if r1 not in analyzed and r2 not in analyzed
+			}
+		diff.change_index(
+			application, df_release_stats['release'].tolist(), previous_changes, reusable
+		).to_csv(diff.changes_path(application), index = False)
+
+	# Updates the row of the application in the corpus summary.
+	summary.update_summary(application)
+
+	# Serializes the figures of the evolution page.
+	if settings.prebuild_figures:
+		figures.prebuild_figures(application)
 
 	print(f"Exported {application} results to csv")
 
 
-print("Done...")
+def analyze_sequential(applications, fingerprints, reuse):
+	# Analyzes all releases of all applications one after the other.
+	# Param 'applications': dict, {'application': ['release']}
+	# Param 'fingerprints': dict, {'application': {'release': fingerprint}}
+	# Param 'reuse': dict, {'application': {'release': bool}}, releases with up to date trees
+
+	for application in applications:
+
+		print(f"Started analyzing {application}")
+
+		results = []
+		for release in applications[application]:
+			if reuse[application][release]:
+				print(f"Reusing {release}")
+			else:
+				print(f"Analyzing {release}")
+			results.append(analyze_release(application, release, reuse[application][release]))
+
+		export_application(
+			application, results,
+			{r for r in applications[application] if not reuse[application][r]})
+		save_manifest(application, fingerprints[application])
+
+
+def analyze_parallel(applications, fingerprints, reuse, num_workers):
+	# Analyzes all releases of all applications using a pool of worker processes.
+	# Statistics of an application are exported as soon as all of its releases are done.
+	# Param 'applications': dict, {'application': ['release']}
+	# Param 'fingerprints': dict, {'application': {'release': fingerprint}}
+	# Param 'reuse': dict, {'application': {'release': bool}}, releases with up to date trees
+	# Param 'num_workers': int, number of worker processes (None = number of CPUs)
+
+	results = {a: {} for a in applications}
+
+	with ProcessPoolExecutor(max_workers = num_workers) as executor:
+		futures = {
+			executor.submit(analyze_release, application, release, reuse[application][release]): (application, release)
+			for application in applications
+			for release in applications[application]
+		}
+
+		for future in as_completed(futures):
+			application, release = futures[future]
+			results[application][release] = future.result()
+			print(f"Analyzed {application} {release}")
+
+			# Exports statistics once all releases of an application are analyzed.
+			if len(results[application]) == len(applications[application]):
+				export_application(
+					application,
+					[results[application][r] for r in applications[application]],
+					{r for r in applications[application] if not reuse[application][r]})
+				save_manifest(application, fingerprints[application])
+				del results[application]
+
+
+if __name__ == '__main__':
+
+	# Creates a dict containing applications and releases: {'application': ['release']}
+	applications = {
+		a: list_releases(a)
+		for a in sorted(os.listdir(settings.input_dir)) if not a.startswith('.')
+	}
+
+	# Creates output folders if not existing.
+	for application in applications:
+		os.makedirs(os.path.join(settings.output_dir, application), exist_ok = True)
+
+	# Compares release folders with the manifest of the last run to find
+	# releases whose exported tree is still up to date.
+	fingerprints = {}
+	reuse = {}
+	for application in applications:
+		manifest = load_manifest(application)
+		fingerprints[application] = {
+			r: release_fingerprint(application, r) for r in applications[application]
+		}
+		reuse[application] = {
+			r: is_up_to_date(application, r, manifest, fingerprints[application][r])
+			for r in applications[application]
+		}
+
+	if settings.num_workers == 1:
+		analyze_sequential(applications, fingerprints, reuse)
+	else:
+		analyze_parallel(applications, fingerprints, reuse, settings.num_workers)
+
+	print("Done...")
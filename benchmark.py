@@ -0,0 +1,312 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+import settings
+
+
+# Benchmark of the analyzer stages and the dashboard data loads and figures.
+# Synthetic releases are generated into a temporary input folder, all data is
+# written to a temporary output folder and the timings are emitted as json:
+#
+# python benchmark.py --folders 200 --files 20 --releases 5 --output results.json
+#
+# Every stage is run 'repeat' times on cold caches, the json contains the
+# best and mean time of each stage so results can be compared across commits.
+
+
+def parse_args(args = None):
+	parser = argparse.ArgumentParser(description = 'Benchmark analyzer and dashboard stages.')
+	parser.add_argument('--apps', type = int, default = 1, help = 'number of applications')
+	parser.add_argument('--releases', type = int, default = 5, help = 'number of releases per application')
+	parser.add_argument('--depth', type = int, default = 5, help = 'maximum folder depth')
+	parser.add_argument('--fanout', type = int, default = 4, help = 'maximum number of subfolders per folder')
+	parser.add_argument('--folders', type = int, default = 200, help = 'number of folders per release')
+	parser.add_argument('--files', type = int, default = 20, help = 'average number of files per folder')
+	parser.add_argument('--file-size', type = int, default = 4096, help = 'average file size in bytes')
+	parser.add_argument('--churn', type = float, default = 0.1, help = 'share of files changed between releases')
+	parser.add_argument('--repeat', type = int, default = 3, help = 'number of runs of each stage')
+	parser.add_argument('--seed', type = int, default = 0, help = 'seed of the generated trees')
+	parser.add_argument('--workdir', help = 'folder for generated input and output (temporary if not set)')
+	parser.add_argument('--output', help = 'json file for the results (stdout if not set)')
+	options = parser.parse_args(args)
+
+	# Maximum number of folders of a tree with the given depth and fan-out.
+	max_folders = sum(options.fanout ** level for level in range(options.depth))
+	if options.folders > max_folders:
+		parser.error(f"--folders {options.folders} exceeds {max_folders} folders possible with --depth {options.depth} and --fanout {options.fanout}")
+	return options
+
+
+def file_content(size, seed):
+	# Returns deterministic content of a generated file.
+	# Param 'size': int, size in bytes
+	# Param 'seed': int, seed of the content
+	return random.Random(seed).getrandbits(size * 8).to_bytes(size, 'little')
+
+
+def generate_release(path, folders):
+	# Writes a release folder.
+	# Param 'folders': dict, {'relative folder path': {'file name': (size, content seed)}}
+	for folder, files in folders.items():
+		os.makedirs(os.path.join(path, folder), exist_ok = True)
+		for name, (size, seed) in files.items():
+			with open(os.path.join(path, folder, name), 'wb') as f:
+				f.write(file_content(size, seed))
+
+
+def generate_application(path, options, rng):
+	# Generates the releases of an application, each release changes a share of
+	# the files of the previous release (contents, added and removed files),
+	# all other files keep their content.
+	# Param 'path': string, input folder of the application
+	# Param 'options': argparse namespace, shape of the trees
+
+	extensions = settings.file_extensions or ['py']
+
+	# Folder hierarchy: random parents up to the maximum depth and fan-out.
+	paths = ['src']
+	subfolders = {'src': 0}
+	while len(paths) < options.folders:
+		parent = rng.choice(paths)
+		if parent.count('/') + 1 >= options.depth or subfolders[parent] >= options.fanout:
+			continue
+		subfolders[parent] += 1
+		child = f"{parent}/mod{len(paths)}"
+		paths.append(child)
+		subfolders[child] = 0
+
+	def random_file():
+		# Returns tuple (size, content seed) of a new or changed file.
+		return max(1, int(rng.expovariate(1 / options.file_size))), rng.getrandbits(64)
+
+	folders = {
+		p: {
+			f"f{i}.{rng.choice(extensions)}": random_file()
+			for i in range(max(1, int(rng.gauss(options.files, options.files / 4))))
+		}
+		for p in paths
+	}
+
+	for number in range(options.releases):
+		generate_release(os.path.join(path, f"1.{number}"), folders)
+
+		# Changes files for the next release.
+		folders = {p: dict(files) for p, files in folders.items()}
+		for p, files in folders.items():
+			for name in list(files):
+				if rng.random() < options.churn:
+					action = rng.random()
+					if action < 0.6:
+						files[name] = random_file()
+					elif action < 0.8 and len(files) > 1:
+						del files[name]
+					else:
+						files[f"n{number}_{name}"] = random_file()
+
+
+def timed(function, repeat, setup = None):
+	# Returns dict with the best and mean time of a function and the result of its last run.
+	# Param 'setup': function called before each run (e.g. to clear caches), not timed
+	times = []
+	result = None
+	for _ in range(repeat):
+		if setup:
+			setup()
+		start = time.perf_counter()
+		result = function()
+		times.append(time.perf_counter() - start)
+	return {'best': min(times), 'mean': sum(times) / len(times), 'repeat': repeat}, result
+
+
+def benchmark_analyzer(applications, options, results):
+	# Times the analyzer stages of all releases and exports the data used by the dashboard benchmarks.
+	import analyze
+	import scanner
+	import storage
+	import metrics
+	import filters
+
+	def add(stage, timing, rows = None):
+		entry = results.setdefault(stage, {'best': 0.0, 'mean': 0.0, 'repeat': timing['repeat'], 'rows': 0})
+		entry['best'] += timing['best']
+		entry['mean'] += timing['mean']
+		if rows is not None:
+			entry['rows'] += rows
+
+	for application, releases in applications.items():
+		exclude, file_extensions = filters.application_filters(application)
+		release_results = []
+
+		for release in releases:
+			path = analyze.release_path(application, release)
+
+			# Walk without content hashes.
+			timing, fs = timed(lambda: scanner.scan_release(path, exclude, file_extensions), options.repeat)
+			add('scan', timing, len(fs))
+
+			# Content hashes of all files.
+			filepaths = [
+				os.path.join(path, p) for p in fs.loc[~fs['folder'].astype(bool), 'path']]
+			timing, _ = timed(
+				lambda: scanner.hash_files(filepaths, settings.hash_mode or 'md5', settings.hash_threads),
+				options.repeat)
+			add('hash', timing, len(filepaths))
+
+			# Complete scan as run by analyze.py (walk, content and tree hashes).
+			timing, fs = timed(
+				lambda: scanner.scan_release(
+					path, exclude, file_extensions, settings.hash_mode, settings.hash_threads),
+				options.repeat)
+			add('scan_hashed', timing, len(fs))
+
+			timing, _ = timed(
+				lambda: sum(len(chunk) for chunk in scanner.stream_release(
+					path, exclude, file_extensions, settings.hash_mode, settings.stream_chunk_size)),
+				options.repeat)
+			add('stream', timing, len(fs))
+
+			timing, _ = timed(lambda: storage.write_tree(application, release, fs), options.repeat)
+			add('write_tree', timing, len(fs))
+
+			def release_metrics():
+				summary = metrics.ReleaseSummary()
+				summary.add(fs)
+				return metrics.release_statistics(release, summary)
+
+			timing, result = timed(release_metrics, options.repeat)
+			add('metrics', timing, len(fs))
+			release_results.append(result)
+
+			timing, _ = timed(
+				lambda: storage.write_compact_tree(application, release, fs), options.repeat)
+			add('compact_tree', timing, len(fs))
+
+		# Statistics, change index (tree merges), corpus summary and prebuilt figures.
+		timing, _ = timed(lambda: analyze.export_application(application, release_results), options.repeat)
+		add('export', timing)
+
+
+def benchmark_dashboard(applications, options, results):
+	# Times the dashboard data loads and figure builders on cold caches.
+	# Pages are imported here, they read the output folder on import.
+	import dataloader
+	import figures
+	import diff
+	import storage
+	from pages import p_release, p_map
+
+	caches = [
+		dataloader._load_release_stats,
+		dataloader._load_files_per_level,
+		dataloader._load_summary,
+		dataloader._load_compact_tree,
+		figures._load_release_stats,
+		p_release._load_folder_tree,
+		p_release._load_graph_elements,
+	]
+
+	def clear_caches():
+		for cache in caches:
+			cache.cache_clear()
+
+	def add(stage, timing):
+		entry = results.setdefault(stage, {'best': 0.0, 'mean': 0.0, 'repeat': timing['repeat']})
+		entry['best'] += timing['best']
+		entry['mean'] += timing['mean']
+
+	for application, releases in applications.items():
+		last = releases[-1]
+
+		stages = {
+			'load_release_stats': lambda: dataloader.load_release_stats(application),
+			'load_files_per_level': lambda: dataloader.load_files_per_level(application),
+			'load_summary': lambda: dataloader.load_summary(),
+			'read_tree': lambda: storage.read_tree(application, last),
+			'load_compact_tree': lambda: dataloader.load_compact_tree(application, last),
+			'release_graph_elements': lambda: p_release.load_graph_elements(application, last),
+			'map_folder_matrix': lambda: p_map.folder_matrix(application),
+			'evolution_figures': lambda: figures.create_figures(application),
+			'evolution_figures_json': lambda: figures.to_json_data(figures.create_figures(application)),
+			'diff_releases': lambda: diff.diff_trees(
+				diff.read_diff_tree(application, releases[0]),
+				diff.read_diff_tree(application, last),
+				settings.hash_mode),
+		}
+
+		for stage, function in stages.items():
+			timing, _ = timed(function, options.repeat, setup = clear_caches)
+			add(stage, timing)
+
+
+def main(args = None):
+	options = parse_args(args)
+	rng = random.Random(options.seed)
+
+	workdir = options.workdir or tempfile.mkdtemp(prefix = 'sourcetreeanalyzer-benchmark-')
+	settings.input_dir = os.path.join(workdir, 'input')
+	settings.output_dir = os.path.join(workdir, 'output')
+	settings.cache_dir = os.path.join(workdir, 'cache')
+
+	try:
+		# Generates the synthetic input folder.
+		start = time.perf_counter()
+		applications = {}
+		for number in range(options.apps):
+			application = f"app{number}"
+			generate_application(os.path.join(settings.input_dir, application), options, rng)
+			applications[application] = sorted(os.listdir(os.path.join(settings.input_dir, application)))
+			os.makedirs(os.path.join(settings.output_dir, application), exist_ok = True)
+		generate_seconds = time.perf_counter() - start
+
+		# Progress messages of the analyzer go to stderr, stdout only gets the json.
+		with contextlib.redirect_stdout(sys.stderr):
+			analyzer_results = {}
+			benchmark_analyzer(applications, options, analyzer_results)
+
+			dashboard_results = {}
+			benchmark_dashboard(applications, options, dashboard_results)
+
+	finally:
+		if not options.workdir:
+			shutil.rmtree(workdir, ignore_errors = True)
+
+	report = {
+		'parameters': {k: v for k, v in vars(options).items() if k not in ('workdir', 'output')},
+		'settings': {
+			'hash_mode': settings.hash_mode,
+			'hash_threads': settings.hash_threads,
+			'output_format': settings.output_format,
+			'stream_chunk_size': settings.stream_chunk_size,
+		},
+		'environment': {
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'numpy': np.__version__,
+			'pandas': pd.__version__,
+		},
+		'generate_seconds': generate_seconds,
+		'analyzer': analyzer_results,
+		'dashboard': dashboard_results,
+	}
+
+	if options.output:
+		with open(options.output, 'w') as f:
+			json.dump(report, f, indent = 1)
+	else:
+		json.dump(report, sys.stdout, indent = 1)
+		print()
+
+	return report
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,163 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+# Arrays of a compact tree, saved as one .npy file each.
+array_names = [
+	'ids',
+	'parent',
+	'child_offsets',
+	'child_index',
+	'subtree_start',
+	'folder',
+	'level',
+	'size_bytes',
+	'num_files',
+	'num_files_direct',
+	'name_code',
+	'extension_code',
+]
+
+
+class CompactTree:
+	# Integer indexed release tree.
+	# Node i is row i of the exported tree (post-order, the root folder is the
+	# last node). Ids are stored as 16 byte md5 digests, parents as node
+	# indices (-1 for the root) and children as CSR index: the children of
+	# node i are child_index[child_offsets[i]:child_offsets[i + 1]]. As nodes
+	# are in post-order, the subtree of node i is the range subtree_start[i]..i.
+	# Names and extensions are interned, nodes store indices into 'names'
+	# and 'extensions' (-1 for files without extension). 'source' describes
+	# the exported tree the compact tree was built from (see 'storage.tree_signature').
+
+	def __init__(self, arrays, names, extensions, source = None):
+		for name in array_names:
+			setattr(self, name, arrays[name])
+		self.names = names
+		self.extensions = extensions
+		self.source = source
+
+	@classmethod
+	def from_frame(cls, fs):
+		# Returns compact tree of a release tree dataframe (rows in post-order).
+		# Param 'fs': dataframe, release tree (see 'scanner.scan_release')
+		n = len(fs)
+
+		ids = np.frombuffer(bytes.fromhex(''.join(fs['id'])), dtype = 'S16')
+		parent = pd.Index(fs['id']).get_indexer(fs['parent']).astype(np.int32)
+
+		# Children index: nodes sorted by parent, stable to keep the row order of siblings.
+		has_parent = parent >= 0
+		child_index = np.flatnonzero(has_parent)
+		child_index = child_index[np.argsort(parent[has_parent], kind = 'stable')].astype(np.int32)
+		child_offsets = np.zeros(n + 1, dtype = np.int32)
+		np.cumsum(np.bincount(parent[has_parent], minlength = n), out = child_offsets[1:])
+
+		folder = fs['folder'].to_numpy(dtype = bool)
+
+		# The subtree of a folder starts where the subtree of its first child starts.
+		subtree_start = np.arange(n, dtype = np.int32)
+		for i in np.flatnonzero(folder):
+			if child_offsets[i + 1] > child_offsets[i]:
+				subtree_start[i] = subtree_start[child_index[child_offsets[i]]]
+
+		name_code, names = pd.factorize(fs['name'])
+		extension_code, extensions = pd.factorize(fs['extension'])
+
+		arrays = {
+			'ids': ids,
+			'parent': parent,
+			'child_offsets': child_offsets,
+			'child_index': child_index,
+			'subtree_start': subtree_start,
+			'folder': folder,
+			'level': fs['level'].to_numpy(dtype = np.int16),
+			'size_bytes': fs['size_bytes'].to_numpy(dtype = np.int64),
+			'num_files': fs['num_files'].fillna(0).to_numpy(dtype = np.int32),
+			'num_files_direct': fs['num_files_direct'].fillna(0).to_numpy(dtype = np.int32),
+			'name_code': name_code.astype(np.int32),
+			'extension_code': extension_code.astype(np.int32),
+		}
+		return cls(arrays, [str(x) for x in names], [str(x) for x in extensions])
+
+	def save(self, path):
+		# Saves the tree to a folder (one .npy file per array, interned tables as json).
+		# The tables are written last, a folder without them is incomplete.
+		os.makedirs(path, exist_ok = True)
+		for name in array_names:
+			np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+		with open(os.path.join(path, 'tables.json'), 'w') as f:
+			json.dump({
+				'names': self.names,
+				'extensions': self.extensions,
+				'num_nodes': len(self),
+				'source': self.source,
+			}, f)
+
+	@classmethod
+	def load(cls, path, mmap_mode = 'r'):
+		# Returns tree saved by 'save', arrays are memory mapped (read only) by default.
+		arrays = {
+			name: np.load(os.path.join(path, name + '.npy'), mmap_mode = mmap_mode)
+			for name in array_names
+		}
+		with open(os.path.join(path, 'tables.json')) as f:
+			tables = json.load(f)
+		tree = cls(arrays, tables['names'], tables['extensions'], tables.get('source'))
+		if len(tree) != tables.get('num_nodes', len(tree)):
+			raise ValueError(f"Incomplete compact tree {path}")
+		return tree
+
+	def __len__(self):
+		return len(self.parent)
+
+	@property
+	def root(self):
+		return len(self) - 1
+
+	def children(self, i):
+		# Returns indices of the children of a node.
+		return self.child_index[self.child_offsets[i]:self.child_offsets[i + 1]]
+
+	def folder_children(self, i):
+		# Returns indices of the subfolders of a folder.
+		children = self.children(i)
+		return children[self.folder[children]]
+
+	def subtree(self, i):
+		# Returns slice of the nodes of the subtree of a node (including the node).
+		return slice(self.subtree_start[i], i + 1)
+
+	def ancestors(self, i):
+		# Returns list of the ancestors of a node, parent first.
+		ancestors = []
+		i = self.parent[i]
+		while i >= 0:
+			ancestors.append(int(i))
+			i = self.parent[i]
+		return ancestors
+
+	def subtree_count(self, mask):
+		# Returns array of the number of nodes of each subtree for which 'mask' is True.
+		# Param 'mask': array of bool, one value per node
+		counts = np.concatenate([[0], np.cumsum(mask)])
+		return counts[np.arange(1, len(self) + 1)] - counts[self.subtree_start]
+
+	def name(self, i):
+		return self.names[self.name_code[i]]
+
+	def hex_id(self, i):
+		# Returns id of a node as hex string (same as the 'id' column of exported trees).
+		return self.ids[i:i + 1].tobytes().hex()
+
+	def hex_ids(self, indices):
+		# Returns list of ids of nodes as hex strings.
+		digest = self.ids[indices].tobytes().hex()
+		return [digest[k:k + 32] for k in range(0, len(digest), 32)]
+
+	def index(self, hex_id):
+		# Returns index of a node by its hex id (-1 if the node does not exist).
+		found = np.flatnonzero(self.ids == bytes.fromhex(hex_id))
+		return int(found[0]) if len(found) else -1
@@ -3,17 +3,23 @@ import dash_bootstrap_components as dbc
 import dash_cytoscape as cyto
 import plotly.express as px
 import pandas as pd
-import folderstats
 import settings
 import os
-from pages import p_evolution, p_index, p_release, p_datatable#, p_release2
+from pages import p_evolution, p_index, p_release, p_datatable, p_map, p_release2
 
 
 # Loads extra layouts for cytoscape graphs (network graphs).
 cyto.load_extra_layouts()
 
 # Loads dash bootstrap stylesheet.
-app = Dash(__name__, external_stylesheets = [dbc.themes.BOOTSTRAP])
+# Responses are compressed by Flask-Compress (see 'settings.compress').
+app = Dash(__name__, external_stylesheets = [dbc.themes.BOOTSTRAP], compress = settings.compress)
+
+# WSGI application used by production servers, e.g. with 4 worker processes:
+# gunicorn dashboard:server --workers 4 --threads 4 --preload
+# Workers share the disk cache (settings.cache_dir), prebuilt figures and the
+# memory mapped compact trees, '--preload' loads the pages once before forking.
+server = app.server
 
 # Supresses callback on initial load.
 app.config.suppress_callback_exceptions=True
@@ -24,6 +30,8 @@ navbar = dbc.NavbarSimple(
 	[
 		dbc.NavItem( dbc.NavLink('Evolution', href='/evolution') ),
 		dbc.NavItem( dbc.NavLink('Release', href='/release') ),
+		dbc.NavItem( dbc.NavLink('Compare', href='/release2') ),
+		dbc.NavItem( dbc.NavLink('Map', href='/map') ),
 		dbc.NavItem( dbc.NavLink('Datatable', href='/datatable') ),
 		dbc.NavItem( dbc.NavLink('About', href='#') ),
 	],
@@ -47,13 +55,16 @@ def display_page(pathname):
 		return p_evolution.layout
 	elif pathname == '/release':
 		return p_release.layout
-	#elif pathname == '/release2':
-		#return p_release2.layout
+	elif pathname == '/release2':
+		return p_release2.layout
+	elif pathname == '/map':
+		return p_map.layout
 	elif pathname == '/datatable':
-		return p_datatable.layout
+		return p_datatable.layout()
 	else:
 		return p_index.layout
 
 
 if __name__ == '__main__':
+	# Development server.
 	app.run_server(debug=True)
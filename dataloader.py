@@ -0,0 +1,115 @@
+import os
+import functools
+import numpy as np
+import pandas as pd
+import settings
+import storage
+import summary
+
+
+# Data access for the dashboard pages.
+# Application data is loaded on first use and kept in bounded LRU caches,
+# so only recently viewed applications are held in memory.
+# Cached dataframes are shared by all callbacks (and threads), they are
+# prepared when the cache is populated and marked read-only, pages must
+# not modify them (no inplace operations, derive new frames instead).
+
+
+def read_only(df):
+	# Returns dataframe with its numpy arrays marked read-only, writing values raises ValueError.
+	# The frame is copied once so its arrays are not shared with other frames.
+	# Param 'df': dataframe
+	df = df.copy()
+	for values in df._mgr.arrays:
+		if isinstance(values, np.ndarray):
+			values.flags.writeable = False
+	return df
+
+
+def list_applications():
+	# Returns sorted list of all analyzed applications.
+	return sorted(
+		a for a in os.listdir(settings.output_dir)
+		if os.path.isdir(os.path.join(settings.output_dir, a)) and not a.startswith('.'))
+
+
+def stats_version(application):
+	# Returns modification time of the release statistics of an application,
+	# used as cache key for data derived from a complete analysis run.
+	# Param 'application': string, name of the application
+	return os.stat(os.path.join(settings.output_dir, application, 'stats_'+application+'.csv')).st_mtime
+
+
+def load_release_stats(application):
+	# Returns release statistics of an application.
+	# Releases are ordered by mtime or by name for applications in 'settings.order_by_name'.
+	# Param 'application': string, name of the application
+	return _load_release_stats(application, stats_version(application))
+
+
+@functools.lru_cache(maxsize = settings.cache_size)
+def _load_release_stats(application, version):
+	return read_only(summary.read_release_stats(application))
+
+
+def load_summary():
+	# Returns first and last release statistics and growth of all applications
+	# (see 'summary'). A missing summary is built from the release statistics
+	# and written once, later calls only read output/summary.csv.
+	try:
+		version = os.stat(summary.summary_path()).st_mtime
+	except FileNotFoundError:
+		summary.write_summary(summary.build_summary(summary.analyzed_applications()))
+		version = os.stat(summary.summary_path()).st_mtime
+	return _load_summary(version)
+
+
+@functools.lru_cache(maxsize = 1)
+def _load_summary(version):
+	return read_only(summary.read_summary())
+
+
+def load_files_per_level(application):
+	# Returns number of files and folders per level of all releases of an application.
+	# Rows are ordered by mtime, except for applications in 'settings.order_by_name'.
+	# Cached per statistics version, analyze.py writes the statistics after this file.
+	# Param 'application': string, name of the application
+	return _load_files_per_level(application, stats_version(application))
+
+
+@functools.lru_cache(maxsize = settings.cache_size)
+def _load_files_per_level(application, version):
+	files_per_level = pd.read_csv(
+		os.path.join(settings.output_dir, application, 'files-per-level_'+application+'.csv'),
+		dtype = {'release': str})
+
+	if application not in settings.order_by_name:
+		files_per_level = files_per_level.sort_values(by = 'mtime', kind = 'stable').reset_index(drop = True)
+
+	return read_only(files_per_level)
+
+
+def tree_version(application, release):
+	# Returns modification time of an exported tree, used as cache key so a
+	# release analyzed again while the dashboard is running is read again.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	return os.stat(storage.tree_path(application, release)).st_mtime
+
+
+def load_compact_tree(application, release):
+	# Returns the compact tree of a release (see 'compact.CompactTree').
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	return _load_compact_tree(application, release, tree_version(application, release))
+
+
+@functools.lru_cache(maxsize = settings.tree_cache_size)
+def _load_compact_tree(application, release, version):
+	return storage.read_compact_tree(application, release)
+
+
+def load_releases(application):
+	# Returns list of all releases of an application in release statistics order.
+	# Param 'application': string, name of the application
+	return load_release_stats(application)['release'].unique().tolist()
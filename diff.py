@@ -0,0 +1,175 @@
+import os
+import pandas as pd
+import settings
+import storage
+import filecache
+
+
+# Columns compared between two releases.
+diff_columns = ['id', 'parent', 'name', 'folder', 'size_bytes', 'num_files', 'num_files_direct']
+
+# Columns of the change index, values are taken from the later release.
+index_columns = {
+	'id': 'id',
+	'parent': 'parent',
+	'name': 'name',
+	'folder': 'folder',
+	'status': 'status',
+	'size_bytes_2': 'size_bytes',
+	'size_bytes_delta': 'size_bytes_delta',
+	'num_files_2': 'num_files',
+	'num_files_delta': 'num_files_delta',
+	'num_files_direct_delta': 'num_files_direct_delta',
+}
+
+
+def diff_trees(tree_1, tree_2, hash_name = None):
+	# Returns dataframe of all folders and files of two release trees with their
+	# values in both releases, deltas and status ('added', 'removed', 'changed', 'unchanged').
+	# Trees are joined on the path hash 'id' (hash join on the index).
+	# Param 'tree_1' 'tree_2': dataframe, trees of the first and the second release
+	# Param 'hash_name': string, content hash column used to detect changed files (optional)
+	# Folders and files count as changed if their Merkle hash ('tree_hash') differs,
+	# trees exported without Merkle hashes are compared by size, file count and content hash.
+
+	# Merkle hashes identify unchanged subtrees if both trees have them.
+	use_tree_hash = 'tree_hash' in tree_1.columns and 'tree_hash' in tree_2.columns
+
+	columns = diff_columns + ([hash_name] if hash_name else []) + (['tree_hash'] if use_tree_hash else [])
+	left = tree_1[columns].set_index('id')
+	right = tree_2[columns].set_index('id')
+
+	merged = left.join(right, how = 'outer', lsuffix = '_1', rsuffix = '_2')
+
+	in_1 = merged['folder_1'].notna()
+	in_2 = merged['folder_2'].notna()
+
+	# Columns which do not change between releases are taken from either release.
+	for column in ['parent', 'name', 'folder']:
+		merged[column] = merged[column + '_2'].where(in_2, merged[column + '_1'])
+		merged.drop(columns = [column + '_1', column + '_2'], inplace = True)
+
+	# Adds deltas, missing values count as 0.
+	for column in ['size_bytes', 'num_files', 'num_files_direct']:
+		merged[column + '_delta'] = merged[column + '_2'].fillna(0) - merged[column + '_1'].fillna(0)
+
+	if use_tree_hash:
+		changed = merged['tree_hash_1'] != merged['tree_hash_2']
+	else:
+		changed = (merged['size_bytes_delta'] != 0) | (merged['num_files_delta'] != 0)
+		if hash_name:
+			changed |= merged[hash_name + '_1'].fillna('') != merged[hash_name + '_2'].fillna('')
+
+	merged['status'] = 'unchanged'
+	merged.loc[in_1 & in_2 & changed, 'status'] = 'changed'
+	merged.loc[~in_1, 'status'] = 'added'
+	merged.loc[~in_2, 'status'] = 'removed'
+
+	return merged.reset_index()
+
+
+def common_hash(tree_1, tree_2):
+	# Returns name of the content hash column of both trees (None if they were not hashed the same way).
+	hash_name = settings.hash_mode
+	if hash_name and hash_name in tree_1.columns and hash_name in tree_2.columns:
+		return hash_name
+	return None
+
+
+def read_diff_tree(application, release):
+	# Returns the columns of the exported tree of a release compared by 'diff_trees'.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	available = storage.read_tree_columns(application, release)
+	columns = diff_columns + [c for c in [settings.hash_mode, 'tree_hash'] if c and c in available]
+	return storage.read_tree(application, release, columns = columns)
+
+
+def changes_path(application):
+	# Returns path of the change index of an application.
+	return os.path.join(settings.output_dir, application, 'changes_' + application + '.csv')
+
+
+def read_changes(application):
+	# Returns the exported change index of an application (None if it has not been exported).
+	try:
+		return pd.read_csv(changes_path(application), dtype = {'release': str, 'previous_release': str})
+	except FileNotFoundError:
+		return None
+
+
+def change_index(application, releases, previous = None, reusable = frozenset()):
+	# Returns dataframe of all folders and files added, removed or changed
+	# between each pair of consecutive releases of an application.
+	# Only the compared columns of at most two trees are held in memory.
+	# Param 'application': string, name of the application
+	# Param 'releases': list, releases in chronological order
+	# Param 'previous': dataframe, change index of the last run (optional)
+	# Param 'reusable': set, tuples (previous release, release) whose rows are taken from 'previous'
+
+	changes = []
+	trees = {}
+
+	for previous_release, release in zip(releases, releases[1:]):
+
+		if (previous_release, release) in reusable:
+			changes.append(previous.loc[
+				(previous['release'] == release) & (previous['previous_release'] == previous_release)])
+			trees = {}
+			continue
+
+		previous_tree = trees.get(previous_release)
+		if previous_tree is None:
+			previous_tree = read_diff_tree(application, previous_release)
+		tree = read_diff_tree(application, release)
+
+		release_diff = diff_trees(previous_tree, tree, common_hash(previous_tree, tree))
+		release_diff = (
+			release_diff.loc[release_diff['status'] != 'unchanged', list(index_columns)]
+			.rename(columns = index_columns)
+		)
+		release_diff.insert(0, 'previous_release', previous_release)
+		release_diff.insert(0, 'release', release)
+		changes.append(release_diff)
+
+		# Keeps only the tree needed by the next pair.
+		trees = {release: tree}
+
+	if not changes:
+		return pd.DataFrame(columns = ['release', 'previous_release'] + list(index_columns.values()))
+	return pd.concat(changes, ignore_index = True)
+
+
+def cache_path(application, release_1, release_2):
+	# Returns path of the cached diff of two releases.
+	return os.path.join(
+		settings.cache_dir, application, 'diff',
+		storage.release_filename(release_1), storage.release_filename(release_2) + '.pkl')
+
+
+def diff_releases(application, release_1, release_2):
+	# Returns diff of two releases of an application (see 'diff_trees').
+	# Diffs are cached on disk and reused as long as both trees are older than the cached diff.
+	# Param 'application': string, name of the application
+	# Param 'release_1' 'release_2': string, names of the first and the second release
+
+	path = cache_path(application, release_1, release_2)
+
+	try:
+		cache_mtime = os.stat(path).st_mtime
+		if all(
+			os.stat(storage.tree_path(application, r)).st_mtime < cache_mtime
+			for r in [release_1, release_2]):
+			return pd.read_pickle(path)
+	except OSError:
+		pass
+
+	tree_1 = read_diff_tree(application, release_1)
+	tree_2 = read_diff_tree(application, release_2)
+
+	diff = diff_trees(tree_1, tree_2, common_hash(tree_1, tree_2))
+
+	# Writes to a temporary file first, concurrent readers never see partial files.
+	filecache.write_atomic(path, diff.to_pickle, 'wb')
+
+	return diff
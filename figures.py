@@ -0,0 +1,273 @@
+import os
+import json
+import functools
+import plotly
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import settings
+import dataloader
+import filecache
+
+
+# Figures of the evolution page.
+# Figures are cached per application and statistics version, in memory and on
+# disk (see 'filecache'). After an analysis run they can be serialized to
+# output/<app>/figures_<app>.json (see 'settings.prebuild_figures'), the
+# dashboard then only reads the json file.
+
+
+def to_kb(b):
+	kb = b/1024
+	return round(kb, 0)
+
+
+def load_release_stats(application):
+	# Returns release statistics of an application with release size in kilobytes.
+	# The converted statistics are cached and read-only (see 'dataloader.read_only').
+	# Param 'application': string, name of the application
+	return _load_release_stats(application, dataloader.stats_version(application))
+
+
+@functools.lru_cache(maxsize = settings.cache_size)
+def _load_release_stats(application, version):
+	stats = dataloader.load_release_stats(application)
+
+	# Converts release size column from bytes to kilobytes.
+	stats = stats.assign(release_size_bytes = stats['release_size_bytes'].apply(to_kb))
+	#stats = stats.assign(avg_file_size_bytes = stats['avg_file_size_bytes'].apply(to_kb))
+
+	return dataloader.read_only(stats)
+
+
+def create_fig_size_multiple_yaxis(data):
+	fig = make_subplots(specs=[[{"secondary_y": True}]])
+	fig.add_trace(
+    go.Scatter(
+			x = data['release'], 
+			y = data['num_files'],
+			name="Num. Files"),
+    secondary_y=False,
+	)
+
+	fig.add_trace(
+    go.Scatter(
+			x = data['release'], 
+			y = data['release_size_bytes'],
+    	name="KB"),
+    secondary_y=True,
+	)
+	fig.update_layout(template='none')
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+
+	return fig
+
+
+def create_fig_growth_num_files(data): 
+	fig = px.bar(
+		data,
+		title = 'test',
+		x = 'release', 
+		y = ['growth_num_files_pct', 'growth_size_bytes_pct'],
+		barmode='group',
+		template = 'simple_white',
+		labels = {
+			'release': 'Release',
+			'growth_num_files_pct': 'Metric',
+		},
+	)
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+	return fig
+
+def create_fig_growth_release_size(data): 
+	fig = px.bar(
+		data,
+		title = 'test',
+		x = 'release', 
+		y = 'growth_size_bytes_pct', 
+		template = 'simple_white',
+		labels = {
+			'release': 'Release',
+			'growth_size_bytes_pct': 'Size',
+		},
+	)
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+	return fig
+
+def create_fig_release_size_bytes(data): 
+	fig = px.line(
+		data,
+		title = 'Release Size (Bytes)',
+		x = 'release', 
+		y = 'release_size_bytes', 
+		template = 'none',
+		labels = {
+			'release': 'Release',
+			'release_size_bytes': 'Size (KB)',
+		},
+	)
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+	return fig
+
+
+def create_fig_total_files(data): 
+	fig = px.line(
+		data,
+		title = 'Total number of files',
+		x = 'release', 
+		y = 'num_files', 
+		template = 'none',
+		labels = {
+			'release': 'Release',
+			'num_files': 'Number of files',
+		},
+	)
+
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+
+	return fig
+
+
+def create_fig_files_per_level(data, application):
+	# Rows are already ordered by mtime (see 'dataloader.load_files_per_level') to ensure
+	# correct xaxis ordering because plotly falls back to alphabetical ordering after grouping.
+
+	fig = px.line(
+		data,
+		title = 'Number of files per level', 
+		x = 'release', 
+		y = 'num_files', 
+		color = 'level', 
+		#markers = True,
+		template = 'none',
+		category_orders={'index': data.index[::-1]}, # Reorder xaxis.
+		labels = {
+			'release': 'Release',
+			'num_files': 'Number of files',
+			'level': 'Tree level',
+		},
+	)
+
+	# Update xaxis range to remove left and right chart padding.
+	fig.update_xaxes(type='category')
+	fig.update_xaxes( range = [0, len(data['release'].unique())-1]	) 
+	fig.update_traces(connectgaps=False)
+	
+	return fig
+
+
+def create_fig_avg_file_size_bytes(data):
+	fig = px.line(
+		data,
+		title = 'Average file size in Bytes',
+		x = 'release', 
+		y = 'avg_file_size_bytes', 
+		template = 'none',
+		labels = {
+			'release': 'Release',
+			'avg_file_size_bytes': 'Avg. file size',
+		},
+	)
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+	return fig
+
+def create_fig_max_file_size_bytes(data):
+	fig = px.line(
+		data,
+		title = 'Max file size in Bytes',
+		x = 'release', 
+		y = 'max_file_size_bytes', 
+		labels = {
+			'release': 'Release',
+			'max_file_size_bytes': 'Max. file size',
+		},
+	)
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+	return fig
+
+def create_fig_avg_folder_size(data):
+	fig = px.bar(
+		data,
+		title = 'Average source folder size (number of files in folder)',
+		x = 'release', 
+		y = 'avg_source_folder_size_num_files', 
+		template = 'none',
+		labels = {
+			'release': 'Release',
+			'avg_source_folder_size_num_files': 'Avg. folder size (num. of files in folder)',
+		},
+	) 
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+	return fig
+
+def create_fig_max_tree_level(data):
+	fig = px.line(
+		data,	
+		title = 'Maximum tree level',
+		x = 'release', 
+		y = 'max_tree_level', 
+		labels = {
+			'release': 'Release',
+			'max_tree_level': 'Maximum tree level',
+		},
+	) 
+	fig.update_layout({ 'xaxis': {'type': 'category'}})
+	return fig
+
+
+def create_figures(application):
+	# Returns list of all figures of the evolution page (in the order of the page callback outputs).
+	# Param 'application': string, name of the application
+	data_release = load_release_stats(application)
+	data_fpl = dataloader.load_files_per_level(application)
+	return [
+		create_fig_size_multiple_yaxis(data_release),
+		create_fig_total_files(data_release),
+		create_fig_growth_num_files(data_release),
+		create_fig_release_size_bytes(data_release),
+		create_fig_growth_release_size(data_release),
+		create_fig_avg_file_size_bytes(data_release),
+		create_fig_files_per_level(data_fpl, application),
+		create_fig_avg_folder_size(data_release),
+		create_fig_max_tree_level(data_release),
+	]
+
+
+def figures_path(application):
+	# Returns path of the prebuilt figures of an application.
+	return os.path.join(settings.output_dir, application, 'figures_' + application + '.json')
+
+
+def prebuild_figures(application):
+	# Serializes all figures of an application to json.
+	# Param 'application': string, name of the application
+	figures = create_figures(application)
+	filecache.write_atomic(
+		figures_path(application),
+		lambda f: json.dump(figures, f, cls = plotly.utils.PlotlyJSONEncoder))
+
+
+def to_json_data(obj):
+	# Returns figures (or other plotly objects) as json compatible lists and dicts.
+	return json.loads(json.dumps(obj, cls = plotly.utils.PlotlyJSONEncoder))
+
+
+def load_figures(application):
+	# Returns list of all figures of an application as json compatible dicts.
+	# Param 'application': string, name of the application
+	return _load_figures(application, dataloader.stats_version(application))
+
+
+@functools.lru_cache(maxsize = settings.cache_size)
+def _load_figures(application, version):
+	# Prebuilt figures are used if they are not older than the statistics,
+	# otherwise figures are built once and shared by all workers through the disk cache.
+	path = figures_path(application)
+	try:
+		if os.stat(path).st_mtime >= version:
+			with open(path) as f:
+				return json.load(f)
+	except (OSError, ValueError):
+		pass
+	return filecache.load_json(
+		application, 'figures', version, lambda: to_json_data(create_figures(application)))
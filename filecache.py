@@ -0,0 +1,68 @@
+import os
+import json
+import tempfile
+import settings
+
+
+# Disk cache of rendered dashboard data (e.g. figure json) shared by all
+# dashboard worker processes. Entries are stored per application and data
+# version in settings.cache_dir, written to a temporary file first and
+# renamed, so concurrent workers and threads never read partial files.
+
+
+def cache_path(application, name, version):
+	# Returns path of a cache entry.
+	# Param 'application': string, name of the application
+	# Param 'name': string, name of the cached data
+	# Param 'version': data version (e.g. mtime of the statistics)
+	return os.path.join(settings.cache_dir, application, f"{name}-{version!r}.json")
+
+
+def write_atomic(path, write, mode = 'w'):
+	# Writes a file through a uniquely named temporary file in the same folder
+	# which is renamed when complete. Safe for several processes and threads
+	# writing the same path, readers see either the old or the new file.
+	# Param 'path': string, path of the file
+	# Param 'write': function writing the data to an open file object
+	# Param 'mode': string, file mode ('w' or 'wb')
+	os.makedirs(os.path.dirname(path), exist_ok = True)
+	fd, temp_path = tempfile.mkstemp(dir = os.path.dirname(path), suffix = '.tmp')
+	try:
+		# Temporary files are private, the written file gets the usual permissions.
+		os.chmod(temp_path, 0o644)
+		with os.fdopen(fd, mode) as f:
+			write(f)
+		os.replace(temp_path, path)
+	except BaseException:
+		try:
+			os.remove(temp_path)
+		except OSError:
+			pass
+		raise
+
+
+def load_json(application, name, version, build):
+	# Returns cached data, built and stored if not cached yet by any worker.
+	# Param 'build': function returning json compatible data
+	path = cache_path(application, name, version)
+
+	try:
+		with open(path) as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		pass
+
+	data = build()
+
+	write_atomic(path, lambda f: json.dump(data, f))
+
+	# Removes entries of older data versions.
+	prefix = name + '-'
+	for filename in os.listdir(os.path.dirname(path)):
+		if filename.startswith(prefix) and filename.endswith('.json') and filename != os.path.basename(path):
+			try:
+				os.remove(os.path.join(os.path.dirname(path), filename))
+			except OSError:
+				pass
+
+	return data
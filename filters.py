@@ -0,0 +1,71 @@
+import re
+import json
+import fnmatch
+import hashlib
+import settings
+
+
+# Characters which make a pattern a glob pattern instead of a plain name.
+glob_characters = frozenset('*?[')
+
+
+class Matcher:
+	# Precompiled matcher of names, extensions or relative paths.
+	# Plain names are looked up in a frozenset, glob patterns (e.g. 'test_*')
+	# are compiled into a single regular expression. Patterns containing '/'
+	# match the path relative to the release root folder (e.g. 'src/vendor/*').
+
+	def __init__(self, patterns = None):
+		# Param 'patterns': list, names and glob patterns
+		patterns = list(patterns or [])
+		self.patterns = sorted(set(patterns))
+
+		self.names = frozenset(p for p in patterns if '/' not in p and not glob_characters.intersection(p))
+		globs = [p for p in patterns if '/' not in p and glob_characters.intersection(p)]
+		paths = [p for p in patterns if '/' in p]
+
+		self.glob = re.compile('|'.join(fnmatch.translate(p) for p in globs)) if globs else None
+		self.paths = re.compile('|'.join(fnmatch.translate(p.strip('/')) for p in paths)) if paths else None
+		self.empty = not patterns
+
+	def __bool__(self):
+		return not self.empty
+
+	def match(self, name, relpath = None):
+		# Returns True if a name (or the relative path) matches one of the patterns.
+		# Param 'name': string, folder or file name, or file extension
+		# Param 'relpath': string, path relative to the release root folder (optional)
+		if name is None:
+			return False
+		if name in self.names:
+			return True
+		if self.glob is not None and self.glob.match(name):
+			return True
+		return self.paths is not None and relpath is not None and self.paths.match(relpath) is not None
+
+
+def compile_matcher(patterns):
+	# Returns Matcher of a list of patterns (unchanged if already compiled).
+	if isinstance(patterns, Matcher):
+		return patterns
+	return Matcher(patterns)
+
+
+def application_filters(application):
+	# Returns tuple (exclude, file_extensions) of compiled matchers of an application.
+	# Applications listed in 'settings.application_filters' override the global lists.
+	# Param 'application': string, name of the application
+	overrides = settings.application_filters.get(application, {})
+	return (
+		Matcher(overrides.get('exclude', settings.exclude)),
+		Matcher(overrides.get('file_extensions', settings.file_extensions)),
+	)
+
+
+def application_digest(application):
+	# Returns md5 hex digest of the effective filters of an application,
+	# used to notice changed filters in the analyze.py manifest.
+	# Param 'application': string, name of the application
+	exclude, file_extensions = application_filters(application)
+	value = json.dumps([exclude.patterns, file_extensions.patterns])
+	return hashlib.md5(value.encode('utf-8')).hexdigest()
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+
+def level_table(fs):
+	# Returns dataframe of the rows of a tree aggregated per level and row type
+	# (index 'level', 'folder'), computed by a single groupby.
+	# Param 'fs': dataframe, tree rows
+	return (
+		fs.assign(source_folder = fs['num_files_direct'] > 0)
+		.groupby(['level', 'folder'])
+		.agg(
+			count = ('size_bytes', 'size'),
+			size_bytes = ('size_bytes', 'sum'),
+			max_size_bytes = ('size_bytes', 'max'),
+			max_num_files_direct = ('num_files_direct', 'max'),
+			num_source_folders = ('source_folder', 'sum'),
+		)
+	)
+
+
+def combine_level_tables(tables):
+	# Returns level table of a whole tree from the level tables of its chunks.
+	# Param 'tables': list, level tables (see 'level_table')
+	if len(tables) == 1:
+		return tables[0]
+	return pd.concat(tables).groupby(level = ['level', 'folder']).agg({
+		'count': 'sum',
+		'size_bytes': 'sum',
+		'max_size_bytes': 'max',
+		'max_num_files_direct': 'max',
+		'num_source_folders': 'sum',
+	})
+
+
+class ReleaseSummary:
+	# Collects the level tables of a release tree, either at once or chunk by chunk.
+
+	def __init__(self):
+		self.mtime = None
+		self.tables = []
+
+	def add(self, fs):
+		# Adds a tree or a chunk of a tree (rows in tree order).
+		# Param 'fs': dataframe, tree rows
+		if fs.empty:
+			return
+
+		# Modification time of the release is the mtime of the first row.
+		if self.mtime is None:
+			self.mtime = fs.iloc[0]['mtime']
+
+		self.tables.append(level_table(fs))
+
+	def level_table(self):
+		# Returns level table of the whole release tree.
+		return combine_level_tables(self.tables)
+
+
+def release_statistics(release, summary):
+	# Returns tuple (release_stats, level_stats), dicts with the release metrics
+	# and lists of the per level metrics.
+	# Param 'release': string, name of the release
+	# Param 'summary': ReleaseSummary, collected metrics of the release tree
+
+	table = summary.level_table()
+	mtime = summary.mtime
+
+	# Splits the level table into files and folders.
+	is_folder = table.index.get_level_values('folder').to_numpy(dtype = bool)
+	files = table[~is_folder].droplevel('folder')
+	folders = table[is_folder].droplevel('folder')
+
+	release_stats = {'release': release}
+
+	# Adds modification time to release statistics.
+	release_stats['mtime'] = mtime
+
+	# Gets total number of source folders.
+	num_source_folders = int(folders['num_source_folders'].sum())
+	release_stats['num_source_folders'] = num_source_folders
+
+	# Calculates source folder size (number of files)
+	release_stats['max_source_folder_size_num_files'] = folders['max_num_files_direct'].max()
+
+	# Gets total number of folders and files.
+	num_files = int(files['count'].sum()) 		# Total number of files.
+	num_folders = int(folders['count'].sum()) 	# Total number of folders.
+	release_stats['num_files'] = num_files
+	release_stats['num_folders'] = num_folders
+
+	# Gets release size in bytes.
+	release_size_bytes = files['size_bytes'].sum()
+	release_stats['release_size_bytes'] = release_size_bytes
+
+	# Gets max file size in bytes.
+	release_stats['max_file_size_bytes'] = files['max_size_bytes'].max()
+
+	# Calculates average file size in bytes.
+	release_stats['avg_file_size_bytes'] = round(np.float64(release_size_bytes) / num_files, 2)
+
+	# Calculates average folder size (number of files in folder).
+	release_stats['avg_source_folder_size_num_files'] = round(num_files / num_source_folders, 2)
+
+	# Calculates average folder size (bytes).
+	release_stats['avg_source_folder_size_bytes'] = round(np.float64(release_size_bytes) / num_source_folders, 0)
+
+	# Gets maximum tree level.
+	release_stats['max_tree_level'] = folders.index.max()
+
+
+	# Get level statistics.
+
+	# Gets number of files and folders per level.
+	files_folders = pd.concat(
+		[files['count'].rename('num_files'), folders['count'].rename('num_folders')],
+		axis = 1
+	).sort_index()
+
+	level_stats = {
+		'release': [release] * len(files_folders),
+		'mtime': [mtime] * len(files_folders),
+		'level': files_folders.index.to_list(),
+		'num_files': files_folders['num_files'].to_list(),
+		'num_folders': files_folders['num_folders'].to_list(),
+	}
+
+	# Gets max number of files and folders per level.
+	release_stats['max_num_files_level'] = files_folders['num_files'].max()
+	release_stats['max_num_folders_level'] = files_folders['num_folders'].max()
+
+	# Gets average number of files and folders per level.
+	release_stats['avg_num_files_level'] = round(files_folders['num_files'].mean(), 2)
+	release_stats['avg_num_folders_level'] = round(files_folders['num_folders'].mean(), 2)
+
+	return release_stats, level_stats
@@ -1,15 +1,21 @@
 from dash import Dash, html, dcc, dash_table, callback, Input, Output
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import dash_bootstrap_components as dbc
 import dash_cytoscape as cyto
 import pandas as pd
+import numpy as np
 import os
 import settings
+import storage
+import dataloader
+import figures
+import filecache
 from base64 import b64encode
 from urllib.parse import quote
-from functools import reduce
+import functools
 
-applications = sorted(os.listdir(settings.output_dir))
+applications = dataloader.list_applications()
 
 # Page elements
 
@@ -25,50 +31,93 @@ for app in applications:
 
 app_dropdown = html.Div(
 	[
-		dbc.Label('Application', html_for='dropdown'),
+		dbc.Label('Application', html_for='dropdown-map-application'),
 		dcc.Dropdown(
-			id = 'dropdown_application',
+			id = 'dropdown-map-application',
 			options = app_dropdown_options,
 		),
 	],
 	className = 'mb-3',
 )
 
-application = 'qbittorrent'
-dfs = []
-matrix = []
 
-prefixed = [filename for filename in sorted(os.listdir(os.path.join(settings.output_dir, application))) if filename.startswith("tree_")]
+def folder_matrix(application):
+	# Returns tuple (matrix, folder ids, releases) with the number of files of each
+	# source folder (rows) in each release (columns), ordered by tree level.
+	# Folders of the compact trees are mapped to row indexes once by their binary
+	# ids and the values are written into a preallocated array.
+	# Param 'application': string, name of the application
 
+	releases = [r for r in dataloader.load_releases(application) if storage.tree_exists(application, r)]
 
-for file in prefixed:
-	df = pd.read_csv(os.path.join(settings.output_dir, application, file))
-	#dfs.append(df['id','num_files_direct'])
-	dfs.append(df.loc[(df['folder'] == True) & (df['num_files_direct'] > 0)][['id','num_files_direct', 'level']])
+	ids, levels, values, columns = [], [], [], []
+	for column, release in enumerate(releases):
+		tree = dataloader.load_compact_tree(application, release)
+		source_folders = np.flatnonzero(np.asarray(tree.folder) & (np.asarray(tree.num_files_direct) > 0))
+		ids.append(tree.ids[source_folders])
+		levels.append(tree.level[source_folders])
+		values.append(tree.num_files_direct[source_folders])
+		columns.append(np.full(len(source_folders), column))
 
-matrixdf = reduce(lambda df1,df2: pd.merge(df1,df2,on=['id', 'level'], how = 'outer'), dfs)
+	ids = np.concatenate(ids)
+	levels = np.concatenate(levels)
 
-matrixdff = matrixdf.iloc[:,2:-1].fillna(0).values.tolist()
-#matrixdff = matrixdf.iloc[:,2:-1].fillna(0).sort_values(by='level').values.tolist()
-map_graph = px.imshow(matrixdff, aspect='auto')
+	# Row of each folder in order of first appearance.
+	folder_ids, first, inverse = np.unique(ids, return_index = True, return_inverse = True)
+	appearance = np.argsort(first)
+	row_of = np.empty(len(folder_ids), dtype = np.int64)
+	row_of[appearance] = np.arange(len(folder_ids))
+	rows = row_of[inverse.ravel()]
+	folder_ids = folder_ids[appearance]
 
-#release = '0.2.0'
+	matrix = np.zeros((len(folder_ids), len(releases)))
+	matrix[rows, np.concatenate(columns)] = np.concatenate(values)
 
-#release_data = pd.read_csv(os.path.join(settings.output_dir, application, 'tree_'+release+'.csv'))
+	# Orders folders by tree level (stable, keeps order of first appearance within a level).
+	folder_levels = np.zeros(len(folder_ids), dtype = levels.dtype)
+	folder_levels[rows] = levels
+	order = np.argsort(folder_levels, kind = 'stable')
 
+	return matrix[order], folder_ids[order], releases
 
 
-"""
+def create_map_graph(application):
+	# Returns heatmap of the number of files in each source folder across all releases.
+	# Param 'application': string, name of the application
+	return _create_map_graph(application, dataloader.stats_version(application))
+
+
+@functools.lru_cache(maxsize = settings.cache_size)
+def _create_map_graph(application, version):
+	# Heatmaps are shared by all dashboard workers through the disk cache.
+	def build():
+		matrix, folder_ids, releases = folder_matrix(application)
+		return figures.to_json_data(px.imshow(
+			matrix,
+			x = releases,
+			aspect = 'auto',
+			labels = {'x': 'Release', 'y': 'Source folder', 'color': 'Number of files'},
+		))
+
+	return filecache.load_json(application, 'map', version, build)
+
+
+# Updates heatmap based on selected application.
 @callback(
-	Output('folder-tree-graph', 'figure'),
-	Input('dropdown_application', 'value')
+	Output('map-graph', 'figure'),
+	Input('dropdown-map-application', 'value'),
+	prevent_initial_call = True
 )
-def update_folder_tree(app):
-"""
+def update_map_graph(app):
+	# Returns heatmap figure.
+	# Param 'app': string, selected application
+	if not app:
+		raise PreventUpdate
+	return create_map_graph(app)
 
 
 layout = dbc.Container([
-	html.H1('', id = 'testtitel'),
-	#app_dropdown,
-	dcc.Graph(figure=map_graph)
+	html.H1('Folder map'),
+	app_dropdown,
+	dcc.Graph(id = 'map-graph')
 ])
@@ -1,16 +1,21 @@
-from dash import Dash, html, dcc, dash_table, callback, Input, Output, State
+from dash import Dash, html, dcc, dash_table, callback, callback_context, Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import dash_bootstrap_components as dbc
 import dash_cytoscape as cyto
 import pandas as pd
+import numpy as np
 import os
 import settings
+import functools
+import heapq
+import dataloader
 from base64 import b64encode
 from urllib.parse import quote
 
 
 # Gets list of all applications.
-applications = sorted(os.listdir(settings.output_dir))
+applications = dataloader.list_applications()
 
 
 
@@ -57,75 +62,167 @@ submit_button = dbc.Button(
 
 
 
-def graph_elements(source_folders):
+def folder_tree(tree):
+	# Returns dict describing the folder hierarchy of a release, used to build graph elements.
+	# Param 'tree': CompactTree, release tree (see 'compact.CompactTree')
+
+	folder = np.asarray(tree.folder)
+
+	return {
+		'tree': tree,
+		# Number of folders in each subtree, subtrees are contiguous node ranges.
+		'num_folders': tree.subtree_count(folder),
+		'root': tree.root,
+		'num_files_max': int(np.max(tree.num_files_direct[folder])),
+	}
+
+
+def visible_folders(tree, expanded, max_level, max_nodes):
+	# Returns tuple (visible folder indices, collapsed folder indices).
+	# Folders are expanded level by level until 'max_level' or the node budget is
+	# reached, folders expanded by the user (and their ancestors) come first.
+	# Param 'tree': dict, folder hierarchy (see 'folder_tree')
+	# Param 'expanded': frozenset, indices of folders expanded by the user
+	# Param 'max_level': int, deepest level expanded by default
+	# Param 'max_nodes': int, maximum number of nodes sent to the browser
+
+	compact_tree = tree['tree']
+
+	# Ancestors of expanded folders have to be expanded to show them.
+	priority = set(expanded)
+	for folder in expanded:
+		priority.update(compact_tree.ancestors(folder))
+
+	visible = [tree['root']]
+	collapsed = set()
+	queue = [(0, 1, tree['root'])]
+
+	while queue:
+		rank, level, folder = heapq.heappop(queue)
+		children = compact_tree.folder_children(folder).tolist()
+		if not children:
+			continue
+
+		if (rank == 0 or level < max_level) and len(visible) + len(children) <= max_nodes:
+			visible += children
+			for child in children:
+				heapq.heappush(queue, (0 if child in priority else 1, level + 1, child))
+		else:
+			collapsed.add(folder)
+
+	return visible, collapsed
+
+
+def graph_elements(tree, expanded):
 	# Returns a dict containing graph nodes and edges from folder structure.
-	# Used to populate cytoscape graph.
-	# Param 'source_folders': dataframe containing folders id, name, parent and num of files.
-
-	# Gets all nodes (folders).
-	node_dict = (
-		source_folders[['id', 'name', 'num_files_direct']]#.astype(str)
-		.fillna(0)
-		.rename(columns={'name': 'label'})
-		.to_dict('records')
-	)
-
-	# Gets all edges (parent/child relationship).
-	edge_dict = (
-		source_folders.iloc[:-1][['parent', 'id']]
-		.rename(columns={'parent': 'source', 'id': 'target'})
-		.to_dict('records')
-	)
+	# Used to populate cytoscape graph. Collapsed folders are shown as aggregate
+	# nodes standing for their whole subtree.
+	# Param 'tree': dict, folder hierarchy (see 'folder_tree')
+	# Param 'expanded': frozenset, indices of folders expanded by the user
+
+	visible, collapsed = visible_folders(
+		tree, expanded, settings.release_graph_max_level, settings.release_graph_max_nodes)
+
+	compact_tree = tree['tree']
+	ids = compact_tree.hex_ids(visible)
+	hex_id = dict(zip(visible, ids))
 
 	# Adds nodes and edges to graph_elements dict.
 	graph_elements = []
-	for node in node_dict:
+	for folder, folder_id in zip(visible, ids):
+		node = {
+			'id': folder_id,
+			'label': compact_tree.name(folder),
+			'num_files_direct': int(compact_tree.num_files_direct[folder]),
+		}
+		if folder in collapsed:
+			hidden = tree['num_folders'][folder] - 1
+			node['label'] = f"{node['label']} (+{hidden})"
+			node['collapsed'] = True
 		graph_elements.append({'data': node})
-	for edge in edge_dict:
-		graph_elements.append({'data': edge})
-	
+	for folder in visible[1:]:
+		graph_elements.append({'data': {'source': hex_id[int(compact_tree.parent[folder])], 'target': hex_id[folder]}})
+
 	return graph_elements
 
 
-def create_network_graph(source_folders):
-	# Returns cytoscape network graph als plotly figure element.
-	# Param 'source_folders': dataframe containing folders id, name, parent and num of files.
+def load_folder_tree(app, release):
+	# Returns folder hierarchy of a release (see 'folder_tree').
+	# Param 'app': string, selected application
+	# Param 'release': string, selected release
+	return _load_folder_tree(app, release, dataloader.tree_version(app, release))
+
+
+@functools.lru_cache(maxsize = settings.tree_cache_size)
+def _load_folder_tree(app, release, version):
+	return folder_tree(dataloader.load_compact_tree(app, release))
+
+
+def load_graph_elements(app, release, expanded = frozenset()):
+	# Returns tuple (graph elements, max number of files in a folder) of a release.
+	# Param 'app': string, selected application
+	# Param 'release': string, selected release
+	# Param 'expanded': frozenset, ids of folders expanded by the user
+	return _load_graph_elements(app, release, expanded, dataloader.tree_version(app, release))
+
+
+@functools.lru_cache(maxsize = settings.tree_cache_size)
+def _load_graph_elements(app, release, expanded, version):
+	# Graph elements are cached per release, expanded folders and tree version,
+	# switching between releases does not parse the tree or rebuild elements again.
+	tree = load_folder_tree(app, release)
+	indices = frozenset(i for i in map(tree['tree'].index, expanded) if i >= 0)
+	return graph_elements(tree, indices), tree['num_files_max']
+
 
-	num_files_max = source_folders['num_files_direct'].max()
+def create_stylesheet(num_files_max):
+	# Returns cytoscape stylesheet, node colors depend on the number of files in a folder.
+	# Param 'num_files_max': int, max number of files in a folder
 
-	fig = cyto.Cytoscape(
-		layout = {
-			'name': 'dagre',
+	return [
+		{
+			'selector': 'node',
+			'style': {
+				'label': 'data(label)',
+				'shape': 'rectangle',
+				'border-width': '1px',
+				'border-color': 'black',
+				'background-color': f"mapData(num_files_direct, 0, {num_files_max}, white, red)",
+			}
+		},
+		{
+			'selector': 'node[?collapsed]',
+			'style': {
+				'border-width': '3px',
+				'border-style': 'double',
+			}
 		},
-		style = {'width': '100%', 'height': '1000px'},
-		elements = graph_elements(source_folders),
-		stylesheet = [
-			{
-				'selector': 'node',
-				'style': {
-					'label': 'data(label)',
-					'shape': 'rectangle',
-					'border-width': '1px',
-					'border-color': 'black',
-					'background-color': f"mapData(num_files_direct, 0, {num_files_max}, white, red)",
-				}
-			},
-			{
-				'selector': 'node:selected',
-				'style': {
-					'background-color': 'red',
-				}
-			},
-			{
-				'selector': 'edge',
-				'style': {
-					'width': '2px',
-					'line-color': 'rgb(219,219,219)',
-				}
+		{
+			'selector': 'node:selected',
+			'style': {
+				'background-color': 'red',
 			}
-		]
-	)
-	return fig 
+		},
+		{
+			'selector': 'edge',
+			'style': {
+				'width': '2px',
+				'line-color': 'rgb(219,219,219)',
+			}
+		}
+	]
+
+
+# Cytoscape network graph, elements are loaded by 'update_graph'.
+network_graph = cyto.Cytoscape(
+	id = 'release-graph',
+	layout = {
+		'name': 'dagre',
+	},
+	style = {'width': '100%', 'height': '1000px'},
+	elements = [],
+	stylesheet = create_stylesheet(0),
+)
 
 
 # Updates release dropdown options based on selected application.
@@ -139,8 +236,7 @@ def update_release_options(app):
 	# Param 'app': sring, selected application
 
 	# Gets all releases from selected app.
-	releases = pd.read_csv(os.path.join(settings.output_dir, app, 'stats_'+app+'.csv'))
-	releases = releases['release'].unique().tolist()
+	releases = dataloader.load_releases(app)
 	release_dropdown_options = []
 
 	for release in releases:
@@ -154,22 +250,54 @@ def update_release_options(app):
 
 
 # Updates network graph based on selected app and release.
+# Clicking a collapsed node expands it, clicking an expanded node collapses it again.
 @callback(
-	Output('network-graph', 'children'),
+	Output('release-graph', 'elements'),
+	Output('release-graph', 'stylesheet'),
+	Output('graph-state', 'data'),
 	Input('submit-button', 'n_clicks'),
+	Input('release-graph', 'tapNodeData'),
 	State('dropdown-application', 'value'),
 	State('dropdown-release', 'value'),
+	State('graph-state', 'data'),
 	prevent_initial_call = True
 )
-def update_graph(n_clicks, app, release):
-	# Returns network graph figure.
+def update_graph(n_clicks, node, app, release, state):
+	# Returns network graph elements, stylesheet and the state of the shown graph.
+	# Param 'node': dict, data of the clicked node
 	# Param 'app': string, selected application 
 	# Param 'release': string, selected release
+	# Param 'state': dict, application, release and expanded folders of the shown graph
+
+	triggered = callback_context.triggered[0]['prop_id']
+
+	if triggered.startswith('release-graph'):
+		if not state or not node:
+			raise PreventUpdate
+		expanded = set(state['expanded'])
+		if node['id'] in expanded:
+			# Collapses the folder and all expanded folders of its subtree,
+			# they would keep their ancestors expanded otherwise.
+			compact_tree = load_folder_tree(state['app'], state['release'])['tree']
+			subtree = compact_tree.subtree(compact_tree.index(node['id']))
+			expanded = {
+				folder for folder in expanded
+				if folder != node['id'] and not subtree.start <= compact_tree.index(folder) < subtree.stop
+			}
+		elif node.get('collapsed'):
+			expanded.add(node['id'])
+		else:
+			raise PreventUpdate
+		state = dict(state, expanded = sorted(expanded))
+	else:
+		if not app or not release:
+			raise PreventUpdate
+		state = {'app': app, 'release': release, 'expanded': []}
 
-	release_data = pd.read_csv(os.path.join(settings.output_dir, app, 'tree_'+release+'.csv'))
-	source_folders = release_data.loc[release_data['folder'] == True].astype({'id': 'string', 'parent': 'string'})
+	elements, num_files_max = load_graph_elements(
+		state['app'], state['release'], frozenset(state['expanded']))
 
-	return create_network_graph(source_folders)
+	return elements, create_stylesheet(num_files_max), state
 
 
 # Creates dash layout.
@@ -178,5 +306,6 @@ layout = dbc.Container([
 	app_dropdown,
 	release_dropdown,
 	submit_button,
-	html.Div('', id = 'network-graph')
+	dcc.Store(id = 'graph-state'),
+	html.Div(network_graph, id = 'network-graph')
 ])
@@ -1,15 +1,19 @@
-from dash import Dash, html, dcc, dash_table, callback, Input, Output
+from dash import Dash, html, dcc, dash_table, callback, Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import dash_bootstrap_components as dbc
 import dash_cytoscape as cyto
 import pandas as pd
 import os
 import settings
+import functools
+import dataloader
+import diff
 from base64 import b64encode
 from urllib.parse import quote
 
 
-applications = sorted(os.listdir(settings.output_dir))
+applications = dataloader.list_applications()
 
 # Page elements
 
@@ -25,9 +29,9 @@ for app in applications:
 
 app_dropdown = html.Div(
 	[
-		dbc.Label('Application', html_for='dropdown'),
+		dbc.Label('Application', html_for='dropdown_compare_application'),
 		dcc.Dropdown(
-			id = 'dropdown_application',
+			id = 'dropdown_compare_application',
 			options = app_dropdown_options,
 		),
 	],
@@ -41,82 +45,67 @@ release_dropdown_group = html.Div(
 		dbc.Label('Release 1', html_for='dropdown_release1'),
 		dcc.Dropdown(
 			id = 'dropdown_release1',
-			options = app_dropdown_options,
+			options = [],
 		),
 		dbc.Label('Release 2', html_for='dropdown_release2'),
 		dcc.Dropdown(
 			id = 'dropdown_release2',
-			options = app_dropdown_options,
+			options = [],
 		),
 	],
 	className = 'mb-3',
 )
 
-application = 'calibre'
-release = '3.0.0'
 mode = 'num_files'
 
-release_data = pd.read_csv(os.path.join(settings.output_dir, application, 'tree_'+release+'.csv'))
 
-release_data_01 = pd.read_csv(os.path.join(settings.output_dir, application, 'tree_2.85.1.csv'))
-#release_data_01 = release_data_01.iloc[:-1][release_data_01['folder'] == True]
-release_data_01 = release_data_01.loc[release_data_01['folder'] == True]
-release_data_02 = pd.read_csv(os.path.join(settings.output_dir, application, 'tree_3.0.0.csv'))
-#release_data_02 = release_data_02.iloc[:-1][release_data_02['folder'] == True]
-release_data_02 = release_data_02.loc[release_data_02['folder'] == True]
+# SVG glyph comparing two values as horizontal bars (release 1 on top, release 2 below).
+node_chart_template = (
+	'<svg xmlns="http://www.w3.org/2000/svg" width="100" height="40" viewBox="0 0 100 40" preserveAspectRatio="none">'
+	'<rect width="100" height="40" fill="rgb(222,222,222)"/>'
+	'<rect y="0" width="{width_1}" height="20" fill="goldenrod"/>'
+	'<rect y="20" width="{width_2}" height="20" fill="red"/>'
+	'</svg>'
+)
 
-merged = pd.merge(release_data_01, release_data_02, on = ['id', 'parent', 'name'], how = 'outer')#.fillna(0)
 
-#merged.to_csv(os.path.join(settings.output_dir, application, 'temp_' + application + '.csv'), index = False)
+@functools.lru_cache(maxsize = 4096)
+def render_node_chart(width_1, width_2):
+	# Returns two bar chart as svg data uri.
+	# Param 'width_1' 'width_2': float, bar widths in percent
+	img_svg = node_chart_template.format(width_1 = width_1, width_2 = width_2)
+	return "data:image/svg+xml;utf8," + quote(img_svg)
 
-source_folders = release_data.loc[release_data['folder'] == True].astype({'id': 'string', 'parent': 'string'})
 
+def create_node_chart(val_1, val_2):
+	# Returns svg data uri comparing the values of a folder in two releases.
+	# Bars are scaled to the larger value, identical bar widths share one cached svg.
+	# Param 'val_1' 'val_2': float, values of the first and second release (NaN if missing)
 
-def create_node_chart(val_1, val_2, range_max):
+	val_1 = 0 if pd.isna(val_1) else val_1
+	val_2 = 0 if pd.isna(val_2) else val_2
 
 	if(val_1 > 0 or val_2 > 0):
-
-		"""
-		chart = px.funnel_area(names=['a', 'b'], values=[4,6])
-		"""
-		chart = px.bar(
-			x=[val_2, val_1],
-			y=['2', '1'],
-			orientation='h',
-			color=["red", "goldenrod"], color_discrete_map="identity"
-		)
-		#chart.update_xaxes(range = [0, range_max])
-		chart.update_layout(
-			plot_bgcolor = 'rgb(222,222,222)',
-			paper_bgcolor = 'rgb(222,222,222)',
-			bargap = 0,
-		)
-		chart.update_xaxes(visible=False)
-
-
-		img_svg = chart.to_image(format='svg').decode()
-
-		img_svg2 = quote(img_svg)
-		datauri = "data:image/svg+xml;utf8," + img_svg2
-		return datauri
+		val_max = max(val_1, val_2)
+		return render_node_chart(round(val_1 / val_max * 100, 1), round(val_2 / val_max * 100, 1))
 	else:
 		return "data:image/svg+xml;utf8,"
 
 
 def graph_elements(source_folders):
-
-	max_num_files = source_folders[[mode + '_x', mode + '_y']].max().max()
+	# Returns list of graph nodes and edges of the folders of a release diff.
+	# Param 'source_folders': dataframe, folders of a release diff (see 'diff.diff_trees')
 
 	node_dict = (
-		source_folders[['id', 'name', mode+'_x', mode+'_y']]
-		#.fillna('0')
+		source_folders[['id', 'name', 'status', mode+'_1', mode+'_2']]
+		.fillna({mode+'_1': 0, mode+'_2': 0})
 		.rename(columns={'name': 'label'})
 		.to_dict('records')
 	)
 
 	edge_dict = (
 			#source_folders.iloc[:-1][['hash_parent', 'hash_id']]
-		source_folders[['parent', 'id']]
+		source_folders.loc[source_folders['parent'].notna(), ['parent', 'id']]
 		.rename(columns={'parent': 'source', 'id': 'target'})
 		.to_dict('records')
 	)
@@ -125,10 +114,9 @@ def graph_elements(source_folders):
 	graph_elements = []
 
 	for node in node_dict:
-		uri = create_node_chart(node[mode+'_x'], node[mode + '_y'], max_num_files)
+		uri = create_node_chart(node[mode+'_1'], node[mode + '_2'])
 		node['uri'] = uri
 		graph_elements.append({'data': node})
-		print('create node')
 	for edge in edge_dict:
 		graph_elements.append({'data': edge})
 		#print(edge)
@@ -144,7 +132,7 @@ network_graph = cyto.Cytoscape(
 		#'name': 'breadthfirst',
 	},
 	style = {'width': '100%', 'height': '1000px'},
-	elements = graph_elements(merged),
+	elements = [],
 	stylesheet = [
 		{
 			'selector': 'node',
@@ -173,25 +161,47 @@ network_graph = cyto.Cytoscape(
 	]
 )
 
-submit_button = dbc.Button(
-	'Submit', id='submit-button', n_clicks = 0
+
+# Updates release dropdown options based on selected application.
+@callback(
+	Output('dropdown_release1', 'options'),
+	Output('dropdown_release2', 'options'),
+	Input('dropdown_compare_application', 'value'),
+	prevent_initial_call = True
 )
+def update_release_options(app):
+	# Returns release options of the selected application for both release dropdowns.
+	# Param 'app': string, selected application
+	if not app:
+		raise PreventUpdate
+	options = [{"label": r, "value": r} for r in dataloader.load_releases(app)]
+	return options, options
+
 
-"""
+# Updates comparison graph based on selected application and releases.
 @callback(
-	Output('folder-tree-graph', 'figure'),
-	Input('submit-button', 'n_clicks'),
-	State('dropdown_application', 'value')
-	State('dropdown_release', 'value')
+	Output('nwgraph', 'elements'),
+	Input('dropdown_release1', 'value'),
+	Input('dropdown_release2', 'value'),
+	State('dropdown_compare_application', 'value'),
+	prevent_initial_call = True
 )
-def update_folder_tree(app, release):
-"""
+def update_graph(release_1, release_2, app):
+	# Returns graph elements of the folders of two releases.
+	# Param 'release_1' 'release_2': string, selected releases
+	# Param 'app': string, selected application
+	if not (app and release_1 and release_2):
+		raise PreventUpdate
+
+	release_diff = diff.diff_releases(app, release_1, release_2)
+	source_folders = release_diff.loc[release_diff['folder'] == True]
+
+	return graph_elements(source_folders)
 
 
 layout = dbc.Container([
 	html.H1('', id = 'testtitel'),
-	#app_dropdown,
-	#release_dropdown_group,
-	#submit_button,
+	app_dropdown,
+	release_dropdown_group,
 	html.Div(network_graph)
 ])
@@ -0,0 +1,696 @@
+import io
+import os
+import stat
+import time
+import zlib
+import hashlib
+import tarfile
+import zipfile
+import threading
+import subprocess
+import pandas as pd
+import filters
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Version of the scanner output, stored in the analyze.py manifest.
+# Must be increased whenever the exported tree changes.
+version = 2
+
+
+# Column order of the tree dataframe (same as the exported tree_*.csv files).
+# The 'hash' placeholder is replaced by the name of the content hash or
+# removed if file contents are not hashed.
+columns = [
+	'path',
+	'name',
+	'extension',
+	'size_bytes',
+	'mtime',
+	'folder',
+	'num_files',
+	'level',
+	'hash',
+	'num_files_direct',
+	'id',
+	'parent',
+	'tree_hash',
+]
+
+# Size of the buffer used to read files for hashing.
+hash_buffer_size = 1048576
+
+# Minimum number of files in a release before file contents are hashed by a thread pool.
+threaded_hash_min_files = 1000
+
+# Extensions of release archives which are scanned without extracting them.
+archive_extensions = ('.tar.gz', '.tgz', '.tar.xz', '.zip')
+
+
+class Crc32:
+	# Fast non-cryptographic content hash with the interface of hashlib objects.
+
+	def __init__(self):
+		self.value = 0
+
+	def update(self, data):
+		self.value = zlib.crc32(data, self.value)
+
+	def hexdigest(self):
+		return '%08x' % self.value
+
+
+# Available content hashes: {'name': constructor}
+hash_algorithms = {
+	'md5': hashlib.md5,
+	'crc32': Crc32,
+}
+
+# Read buffers of the hashing threads.
+_buffers = threading.local()
+
+
+def tree_columns(hash_name):
+	# Returns column names of the tree dataframe.
+	# Param 'hash_name': string, name of the content hash (None if not hashed)
+	if hash_name:
+		return [hash_name if c == 'hash' else c for c in columns]
+	else:
+		return [c for c in columns if c != 'hash']
+
+
+def hash_path(p):
+	# Returns md5 hex digest of a relative path.
+	# This ensures consistent id's even if nodes are added to the folder tree.
+	# Paths are always separated by '/' (the root folder is '.').
+	# Param 'p': string, path relative to the release root folder
+	return hashlib.md5(p.encode('utf-8')).hexdigest()
+
+
+def hash_stream(f, hash_name):
+	# Returns hex digest of the content of a binary file object.
+	# The content is read in chunks into a buffer which is reused by the current thread.
+	# Param 'f': file object opened in binary mode
+	# Param 'hash_name': string, name of the content hash (see 'hash_algorithms')
+	buffer = getattr(_buffers, 'buffer', None)
+	if buffer is None:
+		buffer = _buffers.buffer = bytearray(hash_buffer_size)
+	view = memoryview(buffer)
+
+	checksum = hash_algorithms[hash_name]()
+	while True:
+		size = f.readinto(buffer)
+		if not size:
+			break
+		checksum.update(view[:size])
+	return checksum.hexdigest()
+
+
+def hash_file(filepath, hash_name):
+	# Returns hex digest of the file content.
+	# Param 'filepath': string, path to file
+	# Param 'hash_name': string, name of the content hash (see 'hash_algorithms')
+	with open(filepath, 'rb', buffering = 0) as f:
+		return hash_stream(f, hash_name)
+
+
+def hash_files(filepaths, hash_name, num_threads = 1):
+	# Returns list of content hashes of files.
+	# Files of large releases are hashed by a pool of threads.
+	# Param 'filepaths': list, paths to files
+	# Param 'hash_name': string, name of the content hash
+	# Param 'num_threads': int, maximum number of hashing threads
+	def hash_one(filepath):
+		return hash_file(filepath, hash_name) if os.access(filepath, os.R_OK) else None
+
+	if num_threads > 1 and len(filepaths) >= threaded_hash_min_files:
+		with ThreadPoolExecutor(max_workers = num_threads) as executor:
+			return list(executor.map(hash_one, filepaths))
+	else:
+		return [hash_one(p) for p in filepaths]
+
+
+def to_datetime(timestamp):
+	# Returns local datetime without microseconds (same as folderstats).
+	# Param 'timestamp': float, posix timestamp
+	return datetime.fromtimestamp(timestamp).replace(microsecond = 0)
+
+
+class TreeHasher:
+	# Computes Merkle hashes of tree rows in post-order.
+	# A file hash covers its size and content hash, a folder hash covers the
+	# names and hashes of its children, so identical subtrees of different
+	# releases have the same hash regardless of mtimes. Only child hashes of
+	# folders whose row has not been added yet are kept in memory.
+	# The hashes are written to the 'tree_hash' column for the change index,
+	# which compares them to find changed folders and files (see 'diff.diff_trees').
+
+	def __init__(self):
+		self.children = {}
+
+	def add(self, path, folder, node_id, parent, size, content_hash):
+		# Returns Merkle hash of a row.
+		if folder:
+			value = '\n'.join(sorted(self.children.pop(node_id, [])))
+		else:
+			value = f"{size}\0{content_hash or ''}"
+
+		digest = hashlib.md5(value.encode('utf-8')).hexdigest()
+		self.children.setdefault(parent, []).append(path.rpartition('/')[2] + '\0' + digest)
+		return digest
+
+
+def tree_hashes(paths, folders, ids, parents, sizes, content_hashes):
+	# Returns Merkle hash of every row of a tree (rows in post-order).
+	# Param 'paths' 'folders' 'ids' 'parents' 'sizes': lists, tree columns
+	# Param 'content_hashes': list, content hashes of files (None if not hashed)
+	hasher = TreeHasher()
+	return [
+		hasher.add(*row)
+		for row in zip(paths, folders, ids, parents, sizes, content_hashes)
+	]
+
+
+class Directory:
+	# Release stored as folder on disk.
+
+	def __init__(self, path):
+		self.path = path
+		self.name = os.path.basename(path)
+
+	def listdir(self, folderpath):
+		# Returns list of entries (os.DirEntry) of a folder, empty if not readable.
+		if not os.access(folderpath, os.R_OK):
+			return []
+		with os.scandir(folderpath) as it:
+			return list(it)
+
+	def stat(self, path):
+		return os.stat(path)
+
+	def hash_file(self, filepath, hash_name):
+		# Returns content hash of a file (None if not readable).
+		return hash_file(filepath, hash_name) if os.access(filepath, os.R_OK) else None
+
+	def hash_files(self, filepaths, hash_name, num_threads = 1):
+		return hash_files(filepaths, hash_name, num_threads)
+
+
+class ArchiveEntry:
+	# Folder or file of a release archive or git tree, with the interface of os.DirEntry used by 'walk_release'.
+
+	def __init__(self, name, path, is_dir, size, mtime):
+		self.name = name
+		self.path = path
+		self.dir = is_dir
+		self.result = os.stat_result((0, 0, 0, 0, 0, 0, size, mtime, mtime, mtime))
+		self.children = {} if is_dir else None
+		self.content_hash = None
+
+	def is_symlink(self):
+		return False
+
+	def is_dir(self):
+		return self.dir
+
+	def stat(self):
+		return self.result
+
+
+class Archive:
+	# Release stored as archive (see 'archive_extensions'), read without extracting it.
+	# Members are read once in archive order, content hashes are computed while
+	# reading. Like an extracted and renamed release folder, a single top level
+	# folder containing all members (e.g. 'project-1.0/') is the release root folder.
+	# Directory entries of archives have no size, folder sizes only count files.
+
+	def __init__(self, path, hash_name = None):
+		# Param 'path': string, path to the archive
+		# Param 'hash_name': string, content hash of files (no hashing if None)
+		self.path = path
+		self.name = release_name(os.path.basename(path))
+		self.hash_name = hash_name
+		self.root = ArchiveEntry('', path, True, 0, os.stat(path).st_mtime)
+		self.folders = {}
+		self.files = {}
+
+		if path.endswith('.zip'):
+			self.read_zip()
+		else:
+			self.read_tar()
+
+		# Strips a single top level folder.
+		if len(self.root.children) == 1:
+			top = next(iter(self.root.children.values()))
+			if top.is_dir():
+				self.root.children = top.children
+				self.root.result = top.result
+		self.set_paths(self.root, path)
+
+	def add(self, name, is_dir, size, mtime):
+		# Adds a member to the tree and returns its entry.
+		# Param 'name': string, member path inside the archive
+		parts = [p for p in name.split('/') if p not in ('', '.')]
+		if not parts:
+			return None
+
+		folder = self.root
+		for part in parts[:-1]:
+			child = folder.children.get(part)
+			if child is None:
+				# Folder without own member, its mtime is set to the mtime of the member.
+				child = folder.children[part] = ArchiveEntry(part, None, True, 0, mtime)
+			elif not child.is_dir():
+				return None
+			folder = child
+
+		entry = folder.children.get(parts[-1])
+		if entry is not None and entry.is_dir() and is_dir:
+			# Member of a folder added before its children.
+			entry.result = os.stat_result((0, 0, 0, 0, 0, 0, 0, mtime, mtime, mtime))
+			return entry
+		entry = folder.children[parts[-1]] = ArchiveEntry(parts[-1], None, is_dir, size, mtime)
+		return entry
+
+	def read_tar(self):
+		# Reads members of a tar archive as stream (.tar.gz, .tgz, .tar.xz).
+		entries = {}
+		with tarfile.open(self.path, 'r|*') as tar:
+			for member in tar:
+				if member.isdir():
+					self.add(member.name, True, 0, member.mtime)
+				elif member.isfile():
+					entry = self.add(member.name, False, member.size, member.mtime)
+					if entry is not None and self.hash_name:
+						entry.content_hash = hash_stream(tar.extractfile(member), self.hash_name)
+					entries[member.name] = entry
+				elif member.islnk() and entries.get(member.linkname) is not None:
+					# Hard links are extracted as copies of their target.
+					target = entries[member.linkname]
+					entry = self.add(member.name, False, target.result.st_size, member.mtime)
+					if entry is not None:
+						entry.content_hash = target.content_hash
+					entries[member.name] = entry
+				# Symbolic links and special files are skipped.
+
+	def read_zip(self):
+		# Reads members of a zip archive.
+		with zipfile.ZipFile(self.path) as archive:
+			for info in archive.infolist():
+				mode = info.external_attr >> 16
+				if stat.S_ISLNK(mode):
+					continue
+				mtime = time.mktime(info.date_time + (0, 0, -1))
+				if info.is_dir():
+					self.add(info.filename, True, 0, mtime)
+					continue
+				entry = self.add(info.filename, False, info.file_size, mtime)
+				if entry is not None and self.hash_name:
+					with archive.open(info) as f:
+						entry.content_hash = hash_stream(f, self.hash_name)
+
+	def set_paths(self, folder, path):
+		# Sets virtual paths (archive path and member path) and builds the folder and file index.
+		folder.path = path
+		self.folders[path] = folder
+		for child in folder.children.values():
+			if child.is_dir():
+				self.set_paths(child, os.path.join(path, child.name))
+			else:
+				child.path = os.path.join(path, child.name)
+				self.files[child.path] = child
+
+	def listdir(self, folderpath):
+		return list(self.folders[folderpath].children.values())
+
+	def stat(self, path):
+		return self.folders[path].stat()
+
+	def hash_file(self, filepath, hash_name):
+		return self.files[filepath].content_hash
+
+	def hash_files(self, filepaths, hash_name, num_threads = 1):
+		return [self.files[p].content_hash for p in filepaths]
+
+
+class GitRepository:
+	# Bare git repository whose tags are releases.
+	# Objects are read by long running 'git cat-file' processes and cached by
+	# object id, trees, blob sizes and content hashes shared by several tags
+	# are read only once.
+
+	def __init__(self, path):
+		# Param 'path': string, path to the bare repository
+		self.path = path
+		self.trees = {}
+		self.sizes = {}
+		self.content_hashes = {}
+		self.batch = None
+		self.batch_check = None
+
+	def git(self, *args):
+		# Returns output of a git command.
+		return subprocess.run(
+			['git', '--git-dir', self.path] + list(args),
+			capture_output = True, check = True, text = True).stdout.strip()
+
+	def tags(self, pattern = '*'):
+		# Returns list of tags matching a pattern (see 'git tag --list').
+		return self.git('tag', '--list', pattern).split()
+
+	def read_object(self, object_id):
+		# Returns content of an object.
+		if self.batch is None:
+			self.batch = subprocess.Popen(
+				['git', '--git-dir', self.path, 'cat-file', '--batch'],
+				stdin = subprocess.PIPE, stdout = subprocess.PIPE)
+		self.batch.stdin.write(object_id.encode('ascii') + b'\n')
+		self.batch.stdin.flush()
+		size = int(self.batch.stdout.readline().split()[2])
+		content = self.batch.stdout.read(size)
+		self.batch.stdout.read(1)
+		return content
+
+	def tree(self, tree_id):
+		# Returns list of tuples (name, mode, object id) of a tree object.
+		entries = self.trees.get(tree_id)
+		if entries is None:
+			content = self.read_object(tree_id)
+			id_size = len(tree_id) // 2
+			entries = []
+			i = 0
+			while i < len(content):
+				j = content.index(b'\0', i)
+				mode, name = content[i:j].split(b' ', 1)
+				entries.append((name.decode('utf-8', 'surrogateescape'), mode.decode('ascii'), content[j + 1:j + 1 + id_size].hex()))
+				i = j + 1 + id_size
+			self.trees[tree_id] = entries
+		return entries
+
+	def size(self, blob_id):
+		# Returns size of a blob in bytes.
+		size = self.sizes.get(blob_id)
+		if size is None:
+			if self.batch_check is None:
+				self.batch_check = subprocess.Popen(
+					['git', '--git-dir', self.path, 'cat-file', '--batch-check'],
+					stdin = subprocess.PIPE, stdout = subprocess.PIPE)
+			self.batch_check.stdin.write(blob_id.encode('ascii') + b'\n')
+			self.batch_check.stdin.flush()
+			size = self.sizes[blob_id] = int(self.batch_check.stdout.readline().split()[2])
+		return size
+
+	def content_hash(self, blob_id, hash_name):
+		# Returns content hash of a blob.
+		key = (blob_id, hash_name)
+		content_hash = self.content_hashes.get(key)
+		if content_hash is None:
+			content_hash = self.content_hashes[key] = hash_stream(io.BytesIO(self.read_object(blob_id)), hash_name)
+		return content_hash
+
+
+# Opened git repositories: {'path': GitRepository}
+_git_repositories = {}
+
+
+def git_repository(path):
+	# Returns the (cached) GitRepository of a path.
+	if path not in _git_repositories:
+		_git_repositories[path] = GitRepository(path)
+	return _git_repositories[path]
+
+
+def is_git_repository(path):
+	# Returns True if a path is a bare git repository.
+	return os.path.isfile(os.path.join(path, 'HEAD')) and os.path.isdir(os.path.join(path, 'objects'))
+
+
+class GitRelease:
+	# Release stored as tag of a bare git repository, read from the object store without checkout.
+	# Git does not store mtimes, all folders and files get the commit time of the tag.
+	# Symbolic links and submodules are skipped, folder sizes only count files.
+	# Tree objects, blob sizes and content hashes are cached by object id (see
+	# 'GitRepository'), but every entry of every tag is still walked: rows carry
+	# per tag values (paths, ids, mtime) and are filtered per path, so reading a
+	# tag costs a walk of its whole tree, only reading and hashing objects is
+	# shared with earlier tags.
+
+	def __init__(self, repository, revision):
+		# Param 'repository': GitRepository, repository of the release
+		# Param 'revision': string, tag (or any other revision) of the release
+		self.repository = repository
+		self.path = repository.path
+		self.name = revision
+		self.mtime = int(repository.git('show', '-s', '--format=%ct', revision + '^{commit}'))
+		self.folders = {self.path: repository.git('rev-parse', revision + '^{tree}')}
+		self.files = {}
+
+	def listdir(self, folderpath):
+		entries = []
+		for name, mode, object_id in self.repository.tree(self.folders[folderpath]):
+			path = os.path.join(folderpath, name)
+			if mode == '40000':
+				self.folders[path] = object_id
+				entries.append(ArchiveEntry(name, path, True, 0, self.mtime))
+			elif mode in ('100644', '100755'):
+				self.files[path] = object_id
+				entries.append(ArchiveEntry(name, path, False, self.repository.size(object_id), self.mtime))
+		return entries
+
+	def stat(self, path):
+		return os.stat_result((0, 0, 0, 0, 0, 0, 0, self.mtime, self.mtime, self.mtime))
+
+	def hash_file(self, filepath, hash_name):
+		return self.repository.content_hash(self.files[filepath], hash_name)
+
+	def hash_files(self, filepaths, hash_name, num_threads = 1):
+		return [self.hash_file(p, hash_name) for p in filepaths]
+
+
+def is_archive(path):
+	# Returns True if a release is stored as archive (see 'archive_extensions').
+	return os.path.isfile(path) and path.endswith(archive_extensions)
+
+
+def release_name(filename):
+	# Returns name of a release stored as folder or archive (archive extension removed).
+	for extension in archive_extensions:
+		if filename.endswith(extension):
+			return filename[:-len(extension)]
+	return filename
+
+
+def open_release(release_path, hash_name = None, revision = None):
+	# Returns release source ('Directory', 'Archive' or 'GitRelease') of a release path.
+	# Param 'revision': string, tag of the release if 'release_path' is a bare git repository
+	if revision is not None:
+		return GitRelease(git_repository(release_path), revision)
+	if is_archive(release_path):
+		return Archive(release_path, hash_name)
+	return Directory(release_path)
+
+
+def _open_folder(source, folderpath, name, relpath, level, parent_id):
+	# Returns stack frame of a folder with its entries.
+	# Relative paths of its entries are built by appending their name to 'prefix'.
+	return {
+		'folderpath': folderpath,
+		'name': name,
+		'relpath': relpath,
+		'prefix': '' if relpath == '.' else relpath + '/',
+		'level': level,
+		'id': hash_path(relpath),
+		'parent': parent_id,
+		'entries': source.listdir(folderpath),
+		'next': 0,
+		'size': 0,
+		'num_files': 0,
+		'num_files_direct': 0,
+	}
+
+
+def walk_release(release_path, exclude = None, file_extensions = None, source = None):
+	# Yields rows of the folder tree of a release in post-order (children before
+	# their folder, the release root folder last).
+	# The walk keeps only the stack of open ancestor folders in memory.
+	# Rows are tuples (path on disk, dict of tree columns without content and tree hash).
+	# Folders which do not contain at least one source file in its subtree are skipped.
+	# Param 'release_path': string, path to the release root folder
+	# Param 'exclude': list or filters.Matcher, folder and file names (or glob patterns) to skip
+	# Param 'file_extensions': list or filters.Matcher, extensions of source files (all files if empty)
+	# Param 'source': Directory or Archive, release source (folder on disk if None)
+
+	exclude = filters.compile_matcher(exclude)
+	file_extensions = filters.compile_matcher(file_extensions)
+	source = source or Directory(release_path)
+
+	stack = [_open_folder(source, source.path, source.name, '.', 1, None)]
+
+	while stack:
+		frame = stack[-1]
+
+		# Folder done: adds its totals to the parent folder and yields its row.
+		if frame['next'] == len(frame['entries']):
+			stack.pop()
+			if stack:
+				stack[-1]['size'] += frame['size']
+				stack[-1]['num_files'] += frame['num_files']
+
+			if frame['num_files'] > 0:
+				yield frame['folderpath'], {
+					'path': frame['relpath'],
+					'name': frame['name'],
+					'extension': None,
+					'size_bytes': frame['size'],
+					'mtime': to_datetime(source.stat(frame['folderpath']).st_mtime),
+					'folder': True,
+					'num_files': frame['num_files'],
+					'level': frame['level'],
+					'num_files_direct': frame['num_files_direct'] if frame['num_files_direct'] > 0 else None,
+					'id': frame['id'],
+					'parent': frame['parent'],
+				}
+			continue
+
+		entry = frame['entries'][frame['next']]
+		frame['next'] += 1
+
+		name = entry.name
+		relpath = frame['prefix'] + name
+
+		# Excluded folders are pruned before reading their entries.
+		if name.startswith('.') or exclude.match(name, relpath):
+			continue
+
+		# Symbolic links are not followed.
+		if entry.is_symlink():
+			continue
+
+		if entry.is_dir():
+			try:
+				size = entry.stat().st_size
+				child = _open_folder(source, entry.path, name, relpath, frame['level'] + 1, frame['id'])
+			except OSError:
+				continue
+			frame['size'] += size
+			stack.append(child)
+			continue
+
+		filename, dot, extension = name.rpartition('.')
+		if not dot:
+			filename, extension = name, None
+		if file_extensions and not file_extensions.match(extension):
+			continue
+
+		try:
+			stat = entry.stat()
+		except OSError:
+			continue
+
+		frame['size'] += stat.st_size
+		frame['num_files'] += 1
+		frame['num_files_direct'] += 1
+
+		yield entry.path, {
+			'path': relpath,
+			'name': filename,
+			'extension': extension,
+			'size_bytes': stat.st_size,
+			'mtime': to_datetime(stat.st_mtime),
+			'folder': False,
+			'num_files': None,
+			'level': frame['level'],
+			'num_files_direct': None,
+			'id': hash_path(relpath),
+			'parent': frame['id'],
+		}
+
+
+def _check_hash_name(hash_name):
+	if hash_name and hash_name not in hash_algorithms:
+		raise ValueError(f"Unknown hash '{hash_name}', available: {', '.join(hash_algorithms)}")
+
+
+def to_dataframe(rows, hash_name):
+	# Returns dataframe of tree rows with the column types of exported trees.
+	# Param 'rows': dict of lists, tree columns
+	# Param 'hash_name': string, name of the content hash (None if not hashed)
+	return pd.DataFrame(rows, columns = tree_columns(hash_name)).astype(
+		{'num_files': 'float64', 'num_files_direct': 'float64'})
+
+
+def scan_release(release_path, exclude = None, file_extensions = None, hash_name = None, hash_threads = 1, revision = None):
+	# Returns the folder tree of a release as dataframe (one row per source file and source folder).
+	# The tree is walked once, levels, direct and subtree file counts, path ids
+	# and parent ids are collected during the walk. File contents and Merkle
+	# subtree hashes ('tree_hash') are computed after the walk.
+	# Param 'release_path': string, path to the release root folder or release archive
+	# Param 'exclude': list or filters.Matcher, folder and file names (or glob patterns) to skip
+	# Param 'file_extensions': list or filters.Matcher, extensions of source files (all files if empty)
+	# Param 'hash_name': string, content hash of files, see 'hash_algorithms' (no hashing if None)
+	# Param 'hash_threads': int, number of threads used to hash files of large releases
+	# Param 'revision': string, tag of the release if 'release_path' is a bare git repository
+
+	_check_hash_name(hash_name)
+	source = open_release(release_path, hash_name, revision)
+
+	# Values are appended to column lists during the walk, rows are not kept.
+	rows = {c: [] for c in tree_columns(hash_name)}
+	filepaths = []
+	for filepath, row in walk_release(release_path, exclude, file_extensions, source):
+		for column, value in row.items():
+			rows[column].append(value)
+		if not row['folder']:
+			filepaths.append(filepath)
+
+	content_hashes = [None] * len(rows['path'])
+	if hash_name:
+		# Files are stored before their folder, hashes are inserted in file row order.
+		hashes = iter(source.hash_files(filepaths, hash_name, hash_threads))
+		content_hashes = [None if folder else next(hashes) for folder in rows['folder']]
+		rows[hash_name] = content_hashes
+
+	rows['tree_hash'] = tree_hashes(
+		rows['path'], rows['folder'], rows['id'], rows['parent'], rows['size_bytes'], content_hashes)
+
+	return to_dataframe(rows, hash_name)
+
+
+def stream_release(release_path, exclude = None, file_extensions = None, hash_name = None, chunk_size = 100000, revision = None):
+	# Yields the folder tree of a release as dataframes of at most 'chunk_size' rows,
+	# in the same row order as 'scan_release'. Files are hashed while walking,
+	# memory use is bounded by the chunk size and the depth of the tree
+	# (archives are indexed before the walk, their index is kept in memory).
+	# Param 'release_path': string, path to the release root folder or release archive
+	# Param 'exclude': list or filters.Matcher, folder and file names (or glob patterns) to skip
+	# Param 'file_extensions': list or filters.Matcher, extensions of source files (all files if empty)
+	# Param 'hash_name': string, content hash of files, see 'hash_algorithms' (no hashing if None)
+	# Param 'chunk_size': int, maximum number of rows per dataframe
+	# Param 'revision': string, tag of the release if 'release_path' is a bare git repository
+
+	_check_hash_name(hash_name)
+	source = open_release(release_path, hash_name, revision)
+
+	columns = tree_columns(hash_name)
+	rows = {c: [] for c in columns}
+	hasher = TreeHasher()
+
+	for filepath, row in walk_release(release_path, exclude, file_extensions, source):
+		content_hash = None
+		if hash_name and not row['folder']:
+			content_hash = source.hash_file(filepath, hash_name)
+		if hash_name:
+			row[hash_name] = content_hash
+		row['tree_hash'] = hasher.add(
+			row['path'], row['folder'], row['id'], row['parent'], row['size_bytes'], content_hash)
+
+		for column in columns:
+			rows[column].append(row[column])
+
+		if len(rows['path']) >= chunk_size:
+			yield to_dataframe(rows, hash_name)
+			rows = {c: [] for c in columns}
+
+	if rows['path']:
+		yield to_dataframe(rows, hash_name)
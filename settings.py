@@ -2,6 +2,69 @@ input_dir = 'input'
 
 output_dir = 'output'
 
+# Folder for data cached by the dashboard (e.g. release diffs).
+cache_dir = 'cache'
+
+# Format of the exported release trees.
+# 'csv' writes one tree_<release>.csv per release, 'parquet' writes one
+# dataset per application partitioned by release (output/<app>/tree/release=<release>).
+output_format = 'csv'
+
+# Number of worker processes used by analyze.py.
+# 1 analyzes all releases one after the other, None uses one process per CPU.
+num_workers = 1
+
+# Reuses exported trees of releases which did not change since the last run.
+incremental = True
+
+# Exports changes_<app>.csv listing folders and files added, removed or changed
+# between consecutive releases (in mtime order). Only pairs with a rescanned
+# release are compared again, the compared columns of two trees are held in memory.
+# Changes are detected by the Merkle subtree hashes of the trees ('tree_hash').
+change_index = True
+
+# Streams release trees: rows are written in chunks and metrics are collected
+# chunk by chunk, which keeps memory bounded for very large trees.
+streaming = False
+
+# Number of tree rows per chunk in streaming mode (and when reading trees of unchanged releases).
+stream_chunk_size = 100000
+
+# Tag patterns of applications whose input folder is a bare git repository,
+# each matching tag is analyzed as release: {'application': 'pattern'} (all tags if not listed).
+git_tags = {}
+
+# Exports integer indexed compact trees (output/<app>/compact/<release>) which
+# the dashboard memory maps instead of parsing release trees.
+compact_trees = True
+
+# Serializes the figures of the evolution page after analyzing an application
+# (output/<app>/figures_<app>.json), the dashboard then only reads the json file.
+prebuild_figures = False
+
+# Compresses dashboard responses (gzip/brotli, requires Flask-Compress).
+compress = True
+
+# Content hash of source files written to the exported trees.
+# 'md5', 'crc32' (fast, non-cryptographic) or None to skip reading file contents.
+hash_mode = 'md5'
+
+# Number of threads used to hash file contents of large releases.
+hash_threads = 4
+
+# Maximum number of applications whose statistics are kept in memory by the dashboard.
+cache_size = 8
+
+# Maximum number of release trees kept in memory by the dashboard.
+tree_cache_size = 16
+
+# Deepest tree level shown by default in the release graph, deeper folders are
+# collapsed into aggregate nodes which can be expanded by clicking them.
+release_graph_max_level = 4
+
+# Maximum number of folder nodes sent to the browser by the release graph.
+release_graph_max_nodes = 500
+
 order_by_name = [
 	'caffeine',
 	'godot',
@@ -19,6 +82,8 @@ file_extensions = [
 	'cpp',
 ]
 
+# Folder and file names to skip. Glob patterns (e.g. 'test_*') match names,
+# patterns containing '/' match paths relative to the release root folder.
 exclude = [
 	'androidTest', 
 	'animated-base-test', # fresco
@@ -44,3 +109,7 @@ exclude = [
 	'unittest',
 	'wiki',
 ]
+
+# Per application overrides of 'exclude' and 'file_extensions':
+# {'application': {'exclude': [...], 'file_extensions': [...]}}
+application_filters = {}
@@ -0,0 +1,176 @@
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import settings
+import compact
+
+
+# Tree columns stored dictionary encoded in parquet datasets.
+dictionary_columns = ['path', 'name', 'extension', 'id', 'parent']
+
+
+def release_filename(release):
+	# Returns name of a release usable as file or folder name.
+	# Git tags may contain '/' (e.g. 'release/2.0'), it is escaped as '%2F'
+	# ('%' as '%25'), names of release folders and archives are unchanged.
+	# Param 'release': string, name of the release
+	return release.replace('%', '%25').replace('/', '%2F')
+
+
+def tree_path(application, release):
+	# Returns path of the exported tree of a release.
+	# Csv trees are stored as 'tree_<release>.csv', parquet trees as one
+	# partition 'tree/release=<release>' of a per application dataset.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	filename = release_filename(release)
+	if settings.output_format == 'parquet':
+		return os.path.join(settings.output_dir, application, 'tree', 'release=' + filename, 'part-0.parquet')
+	else:
+		return os.path.join(settings.output_dir, application, 'tree_' + filename + '.csv')
+
+
+def tree_exists(application, release):
+	# Returns True if the tree of a release has been exported.
+	return os.path.exists(tree_path(application, release))
+
+
+class TreeWriter:
+	# Writes the tree of a release chunk by chunk (csv or parquet, see 'settings.output_format').
+
+	def __init__(self, application, release):
+		# Param 'application': string, name of the application
+		# Param 'release': string, name of the release
+		self.path = tree_path(application, release)
+		self.parquet_writer = None
+		self.header = True
+		os.makedirs(os.path.dirname(self.path), exist_ok = True)
+
+		# The compact tree of the previous export is outdated.
+		shutil.rmtree(compact_path(application, release), ignore_errors = True)
+
+	def write(self, fs):
+		# Appends rows to the exported tree.
+		# Param 'fs': dataframe, tree rows from the scanner
+		if settings.output_format == 'parquet':
+			if self.parquet_writer is None:
+				# Columns without values in the first chunk (e.g. only files) are strings.
+				schema = pa.Schema.from_pandas(fs, preserve_index = False)
+				schema = pa.schema([
+					pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+					for f in schema
+				])
+				self.parquet_writer = pq.ParquetWriter(
+					self.path, schema,
+					use_dictionary = [c for c in dictionary_columns if c in fs.columns],
+					compression = 'zstd')
+			self.parquet_writer.write_table(
+				pa.Table.from_pandas(fs, schema = self.parquet_writer.schema, preserve_index = False))
+		else:
+			fs.to_csv(self.path, index = False, header = self.header, mode = 'w' if self.header else 'a')
+			self.header = False
+
+	def close(self):
+		if self.parquet_writer is not None:
+			self.parquet_writer.close()
+
+
+def write_tree(application, release, fs):
+	# Exports the tree of a release.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	# Param 'fs': dataframe, release tree from the scanner
+	writer = TreeWriter(application, release)
+	writer.write(fs)
+	writer.close()
+
+
+def read_tree(application, release, columns = None):
+	# Returns the exported tree of a release as dataframe.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	# Param 'columns': list, columns to read (all columns if None)
+	path = tree_path(application, release)
+
+	if settings.output_format == 'parquet':
+		return pd.read_parquet(path, columns = columns)
+	else:
+		parse_dates = ['mtime'] if columns is None or 'mtime' in columns else None
+		return pd.read_csv(path, usecols = columns, parse_dates = parse_dates)
+
+
+def read_tree_columns(application, release):
+	# Returns list of the column names of the exported tree of a release.
+	path = tree_path(application, release)
+
+	if settings.output_format == 'parquet':
+		return pq.read_schema(path).names
+	else:
+		return pd.read_csv(path, nrows = 0).columns.tolist()
+
+
+def iter_tree(application, release, columns = None, chunk_size = 100000):
+	# Yields the exported tree of a release as dataframes of at most 'chunk_size' rows.
+	# Param 'application': string, name of the application
+	# Param 'release': string, name of the release
+	# Param 'columns': list, columns to read (all columns if None)
+	# Param 'chunk_size': int, maximum number of rows per dataframe
+	path = tree_path(application, release)
+
+	if settings.output_format == 'parquet':
+		for batch in pq.ParquetFile(path).iter_batches(batch_size = chunk_size, columns = columns):
+			yield batch.to_pandas()
+	else:
+		parse_dates = ['mtime'] if columns is None or 'mtime' in columns else None
+		yield from pd.read_csv(path, usecols = columns, parse_dates = parse_dates, chunksize = chunk_size)
+
+
+def compact_path(application, release):
+	# Returns folder of the compact tree of a release (see 'compact.CompactTree').
+	return os.path.join(settings.output_dir, application, 'compact', release_filename(release))
+
+
+def tree_signature(application, release):
+	# Returns dict identifying the exported tree of a release (mtime and size of the tree file).
+	stat = os.stat(tree_path(application, release))
+	return {'tree_mtime': stat.st_mtime, 'tree_size': stat.st_size}
+
+
+def write_compact_tree(application, release, fs):
+	# Exports the compact tree of a release, after its tree has been exported.
+	# Param 'fs': dataframe, release tree from the scanner (same rows as the exported tree)
+	tree = compact.CompactTree.from_frame(fs)
+	tree.source = tree_signature(application, release)
+	tree.save(compact_path(application, release))
+
+
+def load_compact_tree(application, release):
+	# Returns the exported compact tree of a release (None if it is missing,
+	# incomplete or was not built from the current tree file).
+	path = compact_path(application, release)
+	try:
+		tree = compact.CompactTree.load(path)
+	except (OSError, ValueError, KeyError):
+		return None
+	if tree.source != tree_signature(application, release):
+		return None
+	return tree
+
+
+def compact_tree_exists(application, release):
+	# Returns True if the exported compact tree of a release is up to date.
+	return load_compact_tree(application, release) is not None
+
+
+def read_compact_tree(application, release):
+	# Returns the compact tree of a release, memory mapped if an up to date
+	# compact tree has been exported (built from the exported tree otherwise).
+	tree = load_compact_tree(application, release)
+	if tree is not None:
+		return tree
+	return compact.CompactTree.from_frame(read_tree(
+		application, release,
+		columns = ['id', 'parent', 'name', 'extension', 'folder', 'level', 'size_bytes', 'num_files', 'num_files_direct']))
+
@@ -0,0 +1,129 @@
+import os
+import pandas as pd
+import settings
+import filecache
+
+
+# Corpus summary: first and last release statistics and growth of all
+# applications in one table (output/summary.csv). analyze.py updates the
+# row of an application after exporting its statistics, the datatable page
+# only reads this file.
+
+
+def summary_path():
+	# Returns path of the corpus summary.
+	return os.path.join(settings.output_dir, 'summary.csv')
+
+
+def to_kb(b):
+	# Converts bytes to kilobytes.
+	# Param 'b': int, number of bytes
+
+	kb = b/1024
+	return round(kb, 0)
+
+
+def pct_growth(col1, col2):
+	# Return % growth between values of two columns.
+	# Param col1 col2: values of first and last column.
+	return round( ((col2 - col1) / col1 * 100), 0 )
+
+
+def analyzed_applications():
+	# Returns sorted list of applications with exported release statistics.
+	return sorted(
+		a for a in os.listdir(settings.output_dir)
+		if os.path.exists(os.path.join(settings.output_dir, a, 'stats_'+a+'.csv')))
+
+
+def read_release_stats(application):
+	# Returns exported release statistics of an application in release order
+	# (by mtime or by name for applications in 'settings.order_by_name').
+	# Param 'application': string, name of the application
+	stats = pd.read_csv(
+		os.path.join(settings.output_dir, application, 'stats_'+application+'.csv'),
+		dtype = {'release': str})
+
+	# Orders releases by name if necessary.
+	if application in settings.order_by_name:
+		stats.sort_values(by = 'release', inplace = True)
+		stats = stats.reset_index(drop=True)
+
+	return stats
+
+
+def application_summary(application, df):
+	# Returns dict with the statistics of the first and last release of an application.
+	# Param 'application': string, name of the application
+	# Param 'df': dataframe, release statistics in release order
+	return {
+		'app': application,
+		'num_files_first': df.iloc[0]['num_files'],
+		'num_files_last': df.iloc[-1]['num_files'],
+		'avg_file_size_kb_last': df.iloc[-1]['avg_file_size_bytes'],
+		'avg_file_size_kb_first': df.iloc[0]['avg_file_size_bytes'],
+		'release_size_kb_last': df.iloc[-1]['release_size_bytes'],
+		'release_size_kb_first': df.iloc[0]['release_size_bytes'],
+		'max_tree_level_last': df.iloc[-1]['max_tree_level'],
+		'max_tree_level_first': df.iloc[0]['max_tree_level'],
+		'avg_sourcefolder_size_last': round(df.iloc[-1]['avg_source_folder_size_num_files'], 0),
+		'avg_sourcefolder_size_first': round(df.iloc[0]['avg_source_folder_size_num_files'], 0),
+	}
+
+
+def add_growth(app_stats_df):
+	# Converts sizes to kilobytes and adds growth rates to the summary.
+	# Param 'app_stats_df': dataframe, one row per application (see 'application_summary')
+	app_stats_df['growth_num_files'] = app_stats_df['num_files_last'] - app_stats_df['num_files_first']
+	app_stats_df['growth_num_files_pct'] = round(pct_growth(app_stats_df['num_files_first'], app_stats_df['num_files_last']), 2)
+	app_stats_df['avg_file_size_kb_last'] = app_stats_df['avg_file_size_kb_last'].apply(to_kb)
+	app_stats_df['avg_file_size_kb_first'] = app_stats_df['avg_file_size_kb_first'].apply(to_kb)
+	app_stats_df['growth_avg_file_size'] = app_stats_df['avg_file_size_kb_last'] - app_stats_df['avg_file_size_kb_first']
+	app_stats_df['growth_avg_file_size_pct'] = round(pct_growth(app_stats_df['avg_file_size_kb_first'], app_stats_df['avg_file_size_kb_last']), 2)
+	app_stats_df['release_size_kb_last'] = app_stats_df['release_size_kb_last'].apply(to_kb)
+	app_stats_df['release_size_kb_first'] = app_stats_df['release_size_kb_first'].apply(to_kb)
+	app_stats_df['growth_release_size'] = app_stats_df['release_size_kb_last'] - app_stats_df['release_size_kb_first']
+	app_stats_df['growth_release_size_pct'] = round(pct_growth(app_stats_df['release_size_kb_first'], app_stats_df['release_size_kb_last']), 2)
+	app_stats_df['growth_max_tree_level'] = app_stats_df['max_tree_level_last'] - app_stats_df['max_tree_level_first']
+	app_stats_df['growth_max_tree_level_pct'] = round(pct_growth(app_stats_df['max_tree_level_first'], app_stats_df['max_tree_level_last']), 2)
+	app_stats_df['growth_sourcefolder_size'] = round(app_stats_df['avg_sourcefolder_size_last'] - app_stats_df['avg_sourcefolder_size_first'], 0)
+	app_stats_df['growth_sourcefolder_size_pct'] = round(pct_growth(app_stats_df['avg_sourcefolder_size_first'], app_stats_df['avg_sourcefolder_size_last']), 2)
+	return app_stats_df
+
+
+def build_summary(applications):
+	# Returns summary of applications built from their exported release statistics.
+	# Param 'applications': list, names of the applications
+	rows = [application_summary(a, read_release_stats(a)) for a in applications]
+	return add_growth(pd.DataFrame(rows))
+
+
+def write_summary(app_stats_df):
+	# Writes the summary, via a temporary file so readers never see a partial file.
+	filecache.write_atomic(summary_path(), lambda f: app_stats_df.to_csv(f, index = False))
+
+
+def read_summary():
+	# Returns the summary (None if it has not been exported).
+	try:
+		return pd.read_csv(summary_path(), dtype = {'app': str})
+	except FileNotFoundError:
+		return None
+
+
+def update_summary(application):
+	# Replaces the row of an application in the summary, the other rows are kept.
+	# Applications without exported statistics are removed.
+	# Param 'application': string, name of the application
+	app_stats_df = read_summary()
+
+	if app_stats_df is None:
+		# First summary, adds all applications analyzed before.
+		write_summary(build_summary(analyzed_applications()))
+		return
+
+	app_stats_df = pd.concat(
+		[app_stats_df.loc[app_stats_df['app'] != application], build_summary([application])],
+		ignore_index = True)
+	app_stats_df = app_stats_df.loc[app_stats_df['app'].isin(analyzed_applications())]
+	write_summary(app_stats_df.sort_values(by = 'app').reset_index(drop = True))
@@ -0,0 +1,37 @@
+import os
+import sys
+import shutil
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import settings
+import dataloader
+import figures
+
+
+repo_output = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'output')
+
+
+def test_figures_follow_rewritten_statistics(tmp_path, monkeypatch):
+	# Figures and release lists are rebuilt when analyze.py rewrites the statistics.
+	application = 'aseprite'
+	shutil.copytree(os.path.join(repo_output, application), tmp_path / 'output' / application)
+	monkeypatch.setattr(settings, 'output_dir', str(tmp_path / 'output'))
+	monkeypatch.setattr(settings, 'cache_dir', str(tmp_path / 'cache'))
+
+	stats_path = tmp_path / 'output' / application / ('stats_' + application + '.csv')
+	stats = pd.read_csv(stats_path, dtype = {'release': str})
+
+	before = figures.load_figures(application)
+	assert len(before[1]['data'][0]['x']) == len(stats)
+	assert len(dataloader.load_releases(application)) == len(stats)
+
+	# Rewrites the statistics with fewer releases and a newer mtime.
+	stats.iloc[:-5].to_csv(stats_path, index = False)
+	mtime = os.stat(stats_path).st_mtime + 10
+	os.utime(stats_path, (mtime, mtime))
+
+	after = figures.load_figures(application)
+	assert len(after[1]['data'][0]['x']) == len(stats) - 5
+	assert len(dataloader.load_releases(application)) == len(stats) - 5